@@ -1,13 +1,34 @@
+import os
 import pathlib
 import unittest
 import asyncio
 import signal
 import re
 import inspect
-from typing import Optional, TypeVar, Type, Sequence, overload
+import contextlib
+import functools
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Literal,
+    Optional,
+    TypeVar,
+    Type,
+    Sequence,
+    overload,
+)
 from neo3.core import types, cryptography
 from neo3.wallet import account
-from neo3.api.wrappers import GenericContract, NEP17Contract, ChainFacade
+from neo3.api.wrappers import (
+    GenericContract,
+    NEP17Contract,
+    ChainFacade,
+    ContractMethodResult,
+    InvokeReceipt,
+)
 from neo3.api import noderpc
 from neo3.network.payloads.verification import Signer
 from neo3.api.helpers.signing import (
@@ -18,12 +39,35 @@ from neo3.api.helpers.signing import (
 from neo3.api.helpers import unwrap
 from neo3.contracts import nef, manifest
 from dataclasses import dataclass
-from boaconstructor.node import NeoGoNode, RuntimeLog
+from boaconstructor.config import NodeConfig
+from boaconstructor.node import (
+    AsyncNeoGoNode,
+    NeoGoNode,
+    NodeStartupError,
+    RuntimeLog,
+)
+from boaconstructor.daemon import RemoteNode
+from boaconstructor.batch import TransactionBatch
+from boaconstructor.cache import ReadCache
+from boaconstructor.diff import StorageBaseline, StorageChanges
+from boaconstructor.digest import StorageDigest, compute_digest
+from boaconstructor.rpc import DEFAULT_POOL_SIZE, PooledRpcClient
+from boaconstructor.fixture import cached_setup, is_cached_setup, record_artifact
 from boaconstructor.storage import PostProcessor
 
 __version__ = "0.7.0"
 
 ASSERT_REASON = re.compile(r".*Reason: (.*)")
+GAS_EXCEEDED = re.compile(r"gas limit (is )?exceeded|insufficient gas", re.IGNORECASE)
+#: number of differing key ranges and entries per range `assert_storage_digest()` reports.
+MAX_REPORTED_RANGES = 5
+MAX_REPORTED_ENTRIES = 20
+#: environment variable that makes classes attach to a running daemon, see `SmartContractTestCase.use_daemon`.
+USE_DAEMON_ENV = "BOACONSTRUCTOR_USE_DAEMON"
+#: environment variable that makes `assert_storage_digest()` record golden digest files instead of checking them.
+UPDATE_DIGESTS_ENV = "BOACONSTRUCTOR_UPDATE_DIGESTS"
+#: percentage added to the GAS consumed by a call to get its learned system fee, see `learn_fees`.
+LEARNED_FEE_MARGIN = 10
 
 
 class AssertException(Exception):
@@ -43,12 +87,48 @@ T = TypeVar("T")
 class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
     node: NeoGoNode
     contract_hash: types.UInt160
+    #: Attach to a session wide node instead of starting a new node for this class. The node is started by the first
+    #: class that needs it and stopped when the interpreter exits. The wallet and runtime logs are reset for every class
+    #: but chain state is not, so classes sharing a node must not deploy the same contract with the same account.
+    shared_node: bool = False
+    #: Run the node with an on disk database such that `checkpoint()` can be used. Implied by a class setup decorated
+    #: with `cached_setup`. Rolling back to a checkpoint restarts the node, so after a `checkpoint()` every test but
+    #: the first one pays about the startup time of a node in `asyncSetUp()`.
+    enable_checkpoints: bool = False
+    #: Attach to the node of a running `python -m boaconstructor daemon` instead of starting a node. None follows the
+    #: BOACONSTRUCTOR_USE_DAEMON environment variable. The daemon restores its chain to genesis for every class that
+    #: attaches. A node is started as usual if no daemon is running or the class sets `node_config`,
+    #: `on_demand_blocks` or `shared_node` or has a `cached_setup`, which the daemon node does not support.
+    use_daemon: Optional[bool] = None
+    #: Only produce blocks when a transaction is waiting. See `NeoGoNode(on_demand_blocks=...)`.
+    on_demand_blocks: bool = False
+    #: Overrides for the node configuration, e.g. `NodeConfig(max_gas_invoke=100)`. A class with overrides never
+    #: attaches to a daemon.
+    node_config: Optional[NodeConfig] = None
+    #: Remember the GAS consumed by persisted `call()`s per contract, method and signers and pay it as system fee of the
+    #: next such call instead of estimating it with a test invocation first. The fee includes a margin of
+    #: `LEARNED_FEE_MARGIN` percent, a call that runs out of GAS anyway is sent again with an estimated fee.
+    learn_fees: bool = False
+    _learned_fees: dict[tuple, int]
+    #: Cache up to this many results of test invoking `call()`s and `get_storage()` until the next block is persisted.
+    #: Disabled if 0. See `read_cache` for the hit and miss counters.
+    read_cache_size: int = 0
+    read_cache: Optional[ReadCache] = None
+    _at_checkpoint: bool = False
 
     async def asyncSetUp(self) -> None:
         await super().asyncSetUp()
         # disable debug mode because it will warn about functions waiting longer than 0.1 seconds
         # which will be the case for all functions that persist state (e.g. transfer())
         asyncio.get_event_loop().set_debug(False)
+        if self.node.has_checkpoint:
+            # the first test after taking the checkpoint already starts from the right state
+            if not self._at_checkpoint:
+                await self.node.rollback_async()
+                if self.read_cache is not None:
+                    # the restored chain can be at a height the cache has seen with a different state
+                    self.read_cache.clear()
+            type(self)._at_checkpoint = False
         self.node.runtime_logs = []
 
     @property
@@ -59,20 +139,86 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
     def runtime_logs(self) -> list[RuntimeLog]:
         return self.node.runtime_logs
 
+    @classmethod
+    async def rpc_client(cls) -> PooledRpcClient:
+        """
+        Get the pooled RPC client of the node for raw RPC requests. Do not close it.
+        """
+        return await cls.node.rpc_client()
+
+    @classmethod
+    async def _cached_read(
+        cls, key: Hashable, read: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        cache = cls.read_cache
+        if cache is None:
+            return await read()
+        rpc_client = await cls.rpc_client()
+        height = await rpc_client.block_count()
+        value = cache.get(key, height)
+        if value is None:
+            value = await read()
+            cache.put(key, height, value)
+        return value
+
     @classmethod
     def setUpClass(cls) -> None:
-        cls.node = NeoGoNode()
-        # these are called in reverse order
-        cls.addClassCleanup(cls.node.reset)
+        cls._learned_fees = {}
+        cls.read_cache = (
+            ReadCache(cls.read_cache_size) if cls.read_cache_size > 0 else None
+        )
+        if cls._wants_daemon() and (remote := RemoteNode.connect()) is not None:
+            cls.node = remote
+            cls.addClassCleanup(cls.node.stop)
+            return
+
+        persistent = cls.enable_checkpoints or is_cached_setup(cls)
+        if cls.shared_node:
+            cls.node = NeoGoNode.shared(
+                persistent=persistent,
+                on_demand_blocks=cls.on_demand_blocks,
+                config=cls.node_config,
+            )
+            cls.node.new_session()
+            return
+
+        cls.node = NeoGoNode(
+            persistent=persistent,
+            on_demand_blocks=cls.on_demand_blocks,
+            config=cls.node_config,
+        )
         cls.addClassCleanup(cls.node.stop)
 
         def cleanup(unused_sig, unused_frame):
             cls.node.stop()
-            cls.node.reset()
 
         signal.signal(signal.SIGINT, cleanup)
         cls.node.start()
 
+    @classmethod
+    def _wants_daemon(cls) -> bool:
+        use_daemon = cls.use_daemon
+        if use_daemon is None:
+            use_daemon = bool(os.environ.get(USE_DAEMON_ENV))
+        return (
+            use_daemon
+            and cls.node_config is None
+            and not cls.on_demand_blocks
+            and not cls.shared_node
+            and not is_cached_setup(cls)
+        )
+
+    @classmethod
+    def checkpoint(cls) -> None:
+        """
+        Save the current chain state. Before every test the chain is rolled back to this state.
+
+        Call this at the end of the class setup (e.g. after `asyncSetupClass()`) to avoid redeploying contracts or
+        depending on the order of tests. Requires `enable_checkpoints` to be set.
+        """
+        cls.node.checkpoint()
+        cls._at_checkpoint = True
+
     @overload
     @classmethod
     async def call(
@@ -84,6 +230,9 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
         signing_accounts: Optional[Sequence[account.Account]] = None,
         signers: Optional[Sequence[Signer]] = None,
         target_contract: Optional[types.UInt160] = None,
+        system_fee: int = 0,
+        network_fee: int = 0,
+        return_logs: Literal[False] = False,
     ) -> tuple[None, list[noderpc.Notification]]: ...
 
     @overload
@@ -97,8 +246,43 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
         signing_accounts: Optional[Sequence[account.Account]] = None,
         signers: Optional[Sequence[Signer]] = None,
         target_contract: Optional[types.UInt160] = None,
+        system_fee: int = 0,
+        network_fee: int = 0,
+        return_logs: Literal[False] = False,
     ) -> tuple[T, list[noderpc.Notification]]: ...
 
+    @overload
+    @classmethod
+    async def call(
+        cls,
+        method: str,
+        args: Optional[list] = None,
+        *,
+        return_type: None,
+        signing_accounts: Optional[Sequence[account.Account]] = None,
+        signers: Optional[Sequence[Signer]] = None,
+        target_contract: Optional[types.UInt160] = None,
+        system_fee: int = 0,
+        network_fee: int = 0,
+        return_logs: Literal[True],
+    ) -> tuple[None, list[noderpc.Notification], list[RuntimeLog]]: ...
+
+    @overload
+    @classmethod
+    async def call(
+        cls,
+        method: str,
+        args: Optional[list] = None,
+        *,
+        return_type: Type[T],
+        signing_accounts: Optional[Sequence[account.Account]] = None,
+        signers: Optional[Sequence[Signer]] = None,
+        target_contract: Optional[types.UInt160] = None,
+        system_fee: int = 0,
+        network_fee: int = 0,
+        return_logs: Literal[True],
+    ) -> tuple[T, list[noderpc.Notification], list[RuntimeLog]]: ...
+
     @classmethod
     async def call(
         cls,
@@ -109,7 +293,10 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
         signing_accounts: Optional[Sequence[account.Account]] = None,
         signers: Optional[Sequence[Signer]] = None,
         target_contract: Optional[types.UInt160] = None,
-    ) -> tuple[T, list[noderpc.Notification]]:
+        system_fee: int = 0,
+        network_fee: int = 0,
+        return_logs: bool = False,
+    ):
         """
         Calls the contract specified by `contract_hash`
 
@@ -123,6 +310,10 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
                 This can be overridden using the `signers` argument.
             signers: a list of custom signers. Must have the same length as `signing_account` if that is specified.
             target_contract: call a different contract than the one under test. e.g. NeoToken
+            return_logs: also return the runtime logs of this call. Waits until the logs are read from the node.
+            system_fee: system fee of the transaction. Skips the test invocation that estimates it. Ignored for test
+             invokes.
+            network_fee: network fee of the transaction. Calculated if not set. Ignored for test invokes.
         """
         if target_contract is None:
             contract = GenericContract(cls.contract_hash)
@@ -130,67 +321,90 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
             contract = GenericContract(target_contract)
 
         facade = cls.node.facade
+        runtime_logs = []
 
         if signing_accounts is not None:
-            signing_pairs = []
-
-            if signers is not None and len(signers) != len(signing_accounts):
-                raise ValueError(f"signing_accounts and signers length must be equal")
-
-            for i, signing_account in enumerate(signing_accounts):
-                if signers is None:
-                    signer = Signer(signing_account.script_hash)
-                else:
-                    # take it from the supplied list
-                    signer = signers[i]
-                if signing_account.is_multisig:
-                    signing_pairs.append(
-                        (sign_with_multisig_account(signing_account), signer)
-                    )
-                else:
-                    signing_pairs.append((sign_with_account(signing_account), signer))
+            signing_pairs = cls._signing_pairs(signing_accounts, signers)
+            fee_key = None
+            if cls.learn_fees and system_fee == 0:
+                fee_key = (
+                    contract.hash,
+                    method,
+                    tuple(
+                        (signer.account, signer.scope) for _, signer in signing_pairs
+                    ),
+                )
+                system_fee = cls._learned_fees.get(fee_key, 0)
             receipt = await facade.invoke(
-                contract.call_function(method, args), signers=signing_pairs
+                contract.call_function(method, args),
+                signers=signing_pairs,
+                system_fee=system_fee,
+                network_fee=network_fee,
             )
+            if fee_key is not None:
+                if (
+                    system_fee > 0
+                    and receipt.state == "FAULT"
+                    and GAS_EXCEEDED.search(receipt.exception or "")
+                ):
+                    # these arguments need more GAS than learned so far, estimate it once more
+                    receipt = await facade.invoke(
+                        contract.call_function(method, args),
+                        signers=signing_pairs,
+                        network_fee=network_fee,
+                    )
+                if receipt.state == "HALT":
+                    cls._learned_fees[fee_key] = max(
+                        cls._learned_fees.get(fee_key, 0),
+                        receipt.gas_consumed * (100 + LEARNED_FEE_MARGIN) // 100,
+                    )
+            cls._check_vmstate(receipt)
+            if return_logs:
+                runtime_logs = await cls.node.collect_runtime_logs(txid=receipt.tx_hash)
         else:
             signing_pairs = None
             if signers is not None:
                 signing_pairs = list(map(lambda s: (no_signing(), s), signers))
-            receipt = await facade.test_invoke(
-                contract.call_function(method, args), signers=signing_pairs
-            )
-        cls._check_vmstate(receipt)
+            f = contract.call_function(method, args)
+            if return_logs:
+                # a test invocation has no transaction hash of its own, the tag identifies it in the logs
+                tag, script = cls.node.tag_script(f.script)
+                f = ContractMethodResult(script, f.execution_processor)
+                receipt = await facade.test_invoke(f, signers=signing_pairs)
+            else:
+                signers_key = tuple(s.to_array() for _, s in signing_pairs or [])
+                receipt = await cls._cached_read(
+                    ("invoke", f.script, signers_key),
+                    lambda: facade.test_invoke(f, signers=signing_pairs),
+                )
+            cls._check_vmstate(receipt)
+            if return_logs:
+                runtime_logs = await cls.node.collect_runtime_logs(tag=tag)
         exec_result = receipt.result
         notifications = receipt.notifications
 
-        # Can't seem to get mypy to understand the return type of the first element in the tuple
-        if return_type is str:
-            return unwrap.as_str(exec_result), notifications  # type: ignore
-        elif return_type is int:
-            return unwrap.as_int(exec_result), notifications  # type: ignore
-        elif return_type is bool:
-            return unwrap.as_bool(exec_result), notifications  # type: ignore
-        elif return_type is dict:
-            return unwrap.as_dict(exec_result), notifications  # type: ignore
-        elif return_type is list:
-            return unwrap.as_list(exec_result), notifications  # type: ignore
-        elif return_type is types.UInt160:
-            return unwrap.as_uint160(exec_result), notifications  # type: ignore
-        elif return_type is types.UInt256:
-            return unwrap.as_uint256(exec_result), notifications  # type: ignore
-        elif return_type is bytes:
-            return unwrap.as_bytes(exec_result), notifications  # type: ignore
-        elif return_type is cryptography.ECPoint:
-            return unwrap.as_public_key(exec_result), notifications  # type: ignore
-        elif return_type is None:
-            return unwrap.as_none(exec_result), notifications  # type: ignore
-        else:
-            raise ValueError(f"unsupported return_type: {return_type}")
+        value = cls._unwrap(exec_result, return_type)
+
+        if return_logs:
+            return value, notifications, runtime_logs
+        return value, notifications
 
     @classmethod
     async def deploy(
-        cls, path_to_nef: str, signing_account: account.Account
+        cls,
+        path_to_nef: str,
+        signing_account: account.Account,
+        *,
+        system_fee: int = 0,
+        network_fee: int = 0,
     ) -> types.UInt160:
+        """
+        Deploy the contract at `path_to_nef` (relative to the calling test file) and its manifest.
+
+        Args:
+            system_fee: system fee of the deploy transaction. Skips the test invocation that estimates it.
+            network_fee: network fee of the deploy transaction. Calculated if not set.
+        """
         # fix relative path resolving by looking up the call stack because the test might not get started from
         # the working directory that defines the tests e.g. when using `unittest discover`
         frame = inspect.stack()[1]
@@ -203,6 +417,8 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
         if not pathlib.Path(manifest_path).is_file():
             raise ValueError(f"can't find manifest at {manifest_path}")
         _manifest = manifest.ContractManifest.from_file(str(manifest_path))
+        record_artifact(nef_path)
+        record_artifact(manifest_path)
 
         if signing_account.is_multisig:
             sign_pair = (
@@ -216,10 +432,43 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
                 Signer(signing_account.script_hash),
             )
         receipt = await cls.node.facade.invoke(
-            GenericContract.deploy(_nef, _manifest), signers=[sign_pair]
+            GenericContract.deploy(_nef, _manifest),
+            signers=[sign_pair],
+            system_fee=system_fee,
+            network_fee=network_fee,
         )
         return receipt.result
 
+    @overload
+    @classmethod
+    async def transfer(
+        cls,
+        token: types.UInt160,
+        source: types.UInt160,
+        destination: types.UInt160,
+        amount: int,
+        decimals: int,
+        signing_account: Optional[account.Account] = None,
+        system_fee: int = 0,
+        *,
+        return_logs: Literal[False] = False,
+    ) -> tuple[bool, list[noderpc.Notification]]: ...
+
+    @overload
+    @classmethod
+    async def transfer(
+        cls,
+        token: types.UInt160,
+        source: types.UInt160,
+        destination: types.UInt160,
+        amount: int,
+        decimals: int,
+        signing_account: Optional[account.Account] = None,
+        system_fee: int = 0,
+        *,
+        return_logs: Literal[True],
+    ) -> tuple[bool, list[noderpc.Notification], list[RuntimeLog]]: ...
+
     @classmethod
     async def transfer(
         cls,
@@ -230,7 +479,15 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
         decimals: int,
         signing_account: Optional[account.Account] = None,
         system_fee: int = 0,
-    ) -> tuple[bool, list[noderpc.Notification]]:
+        *,
+        return_logs: bool = False,
+    ):
+        """
+        Transfer `amount` of NEP-17 `token` from `source` to `destination`.
+
+        Args:
+            return_logs: also return the runtime logs of the transfer. Waits until the logs are read from the node.
+        """
         contract = NEP17Contract(token)
         if signing_account is None:
             signing_account = cls.node.account_committee
@@ -260,49 +517,488 @@ class SmartContractTestCase(unittest.IsolatedAsyncioTestCase):
                 raise AbortException(cls._get_assert_reason(exception))
             else:
                 raise ValueError(exception)
+        if return_logs:
+            runtime_logs = await cls.node.collect_runtime_logs(txid=receipt.tx_hash)
+            return receipt.result, receipt.notifications, runtime_logs
         return receipt.result, receipt.notifications
 
     @classmethod
     async def get_storage(
         cls,
-        prefix: Optional[bytes] = None,
+        prefix: Optional[bytes | Sequence[bytes]] = None,
         *,
         target_contract: Optional[types.UInt160] = None,
         remove_prefix: bool = False,
         key_post_processor: Optional[PostProcessor] = None,
         values_post_processor: Optional[PostProcessor] = None,
+        start_key: Optional[bytes] = None,
+        limit: Optional[int] = None,
     ) -> dict[bytes, bytes]:
         """
         Gets the entries in the storage of the contract specified by `contract_hash`
 
         Args:
-            prefix: prefix to filter the entries in the storage. Return the entire storage if not set.
+            prefix: prefix to filter the entries in the storage. Return the entire storage if not set. A list of
+             disjoint prefixes is scanned concurrently.
             target_contract: gets the storage of a different contract than the one under test. e.g. NeoToken
             remove_prefix: whether the prefix should be removed from the output keys. False by default.
             key_post_processor: a function to post process the storage key before placing it in the dictionary.
             values_post_processor: a function to post process the storage value before placing it in the dictionary.
+            start_key: skip the entries with keys before this key.
+            limit: return at most this many entries per prefix.
+
+        Use `iter_storage()` to go through a large storage without holding all entries in memory.
         """
         if target_contract is None:
-            contract = GenericContract(cls.contract_hash)
+            contract_hash = cls.contract_hash
         else:
-            contract = GenericContract(target_contract)
+            contract_hash = target_contract
+        if prefix is None or isinstance(prefix, bytes):
+            prefixes = [prefix or b""]
+        else:
+            prefixes = list(prefix)
+            ordered = sorted(prefixes)
+            # a prefix that starts with another one sorts right after it or after prefixes that also do
+            if any(b.startswith(a) for a, b in zip(ordered, ordered[1:])):
+                raise ValueError("prefixes must be disjoint")
 
-        if not prefix and remove_prefix:
-            remove_prefix = False
+        rpc_client = await cls.rpc_client()
 
+        async def read(p: bytes):
+            return [
+                item
+                async for item in rpc_client.iter_storage(
+                    contract_hash, p, start_key=start_key, limit=limit
+                )
+            ]
+
+        pages = await asyncio.gather(
+            *(
+                cls._cached_read(
+                    ("storage", contract_hash, p, start_key, limit),
+                    functools.partial(read, p),
+                )
+                for p in prefixes
+            )
+        )
         results = {}
-        async with noderpc.NeoRpcClient(cls.node.facade.rpc_host) as rpc_client:
-            async for k, v in rpc_client.find_states(contract.hash, prefix):
-                if remove_prefix:
-                    k = k.removeprefix(prefix)
-                if key_post_processor is not None:
-                    k = key_post_processor(k)
-                if values_post_processor is not None:
-                    v = values_post_processor(v)
+        for p, items in zip(prefixes, pages):
+            for k, v in items:
+                k, v = cls._post_process_storage(
+                    k, v, p, remove_prefix, key_post_processor, values_post_processor
+                )
                 results[k] = v
+        return results
 
+    @classmethod
+    async def iter_storage(
+        cls,
+        prefix: Optional[bytes] = None,
+        *,
+        target_contract: Optional[types.UInt160] = None,
+        remove_prefix: bool = False,
+        key_post_processor: Optional[PostProcessor] = None,
+        values_post_processor: Optional[PostProcessor] = None,
+        start_key: Optional[bytes] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[tuple[Any, Any]]:
+        """
+        Iterate over the storage entries in key order as pages arrive from the node. Takes the same arguments as
+        `get_storage()`, but only a single prefix.
+
+        Example:
+            async for key, value in self.iter_storage(b"balance", values_post_processor=storage.as_int):
+                self.assertGreaterEqual(value, 0)
+        """
+        if target_contract is None:
+            contract_hash = cls.contract_hash
+        else:
+            contract_hash = target_contract
+        prefix = prefix or b""
+        rpc_client = await cls.rpc_client()
+        async for k, v in rpc_client.iter_storage(
+            contract_hash, prefix, start_key=start_key, limit=limit
+        ):
+            yield cls._post_process_storage(
+                k, v, prefix, remove_prefix, key_post_processor, values_post_processor
+            )
+
+    @classmethod
+    async def count_storage(
+        cls,
+        prefix: Optional[bytes] = None,
+        *,
+        target_contract: Optional[types.UInt160] = None,
+    ) -> int:
+        """
+        Count the storage entries with keys starting with `prefix` without fetching all of them.
+        """
+        if target_contract is None:
+            contract_hash = cls.contract_hash
+        else:
+            contract_hash = target_contract
+        rpc_client = await cls.rpc_client()
+        return await cls._cached_read(
+            ("storage_count", contract_hash, prefix or b""),
+            lambda: rpc_client.count_storage(contract_hash, prefix or b""),
+        )
+
+    @classmethod
+    async def storage_diff(
+        cls,
+        prefix: Optional[bytes] = None,
+        *,
+        target_contract: Optional[types.UInt160] = None,
+        remove_prefix: bool = False,
+        key_post_processor: Optional[PostProcessor] = None,
+        values_post_processor: Optional[PostProcessor] = None,
+    ) -> StorageBaseline:
+        """
+        Record the storage entries with keys starting with `prefix` as a baseline to compare with later. The arguments
+        are the same as for `get_storage()` and are applied to the reported changes.
+
+        Example:
+            baseline = await self.storage_diff(b"balance", values_post_processor=storage.as_int)
+            await self.call("mint", [user, 10], return_type=bool, signing_accounts=[owner])
+            changes = await baseline.changes()
+            self.assertEqual({b"balance" + user.to_array(): 10}, changes.added)
+        """
+        if target_contract is None:
+            contract_hash = cls.contract_hash
+        else:
+            contract_hash = target_contract
+        baseline = StorageBaseline(
+            cls,
+            contract_hash,
+            prefix or b"",
+            remove_prefix,
+            key_post_processor,
+            values_post_processor,
+        )
+        await baseline.record()
+        return baseline
+
+    @classmethod
+    async def storage_digest(
+        cls,
+        prefix: Optional[bytes] = None,
+        *,
+        target_contract: Optional[types.UInt160] = None,
+    ) -> StorageDigest:
+        """
+        Hash the storage entries with keys starting with `prefix` without holding all of them in memory. See
+        `assert_storage_digest()`.
+        """
+        if target_contract is None:
+            contract_hash = cls.contract_hash
+        else:
+            contract_hash = target_contract
+        return await compute_digest(
+            await cls.rpc_client(), contract_hash, prefix or b""
+        )
+
+    async def assert_storage_digest(
+        self,
+        expected: StorageDigest | str | pathlib.Path,
+        prefix: Optional[bytes] = None,
+        *,
+        target_contract: Optional[types.UInt160] = None,
+    ) -> None:
+        """
+        Assert that the storage entries with keys starting with `prefix` are in the expected state.
+
+        Args:
+            expected: a digest, a hex digest or the path of a golden digest file relative to the test file. Set the
+             BOACONSTRUCTOR_UPDATE_DIGESTS environment variable to record the current storage to the file instead,
+             without the variable a missing file fails the assertion.
+            prefix: prefix to filter the entries in the storage. The entire storage if not set.
+            target_contract: check the storage of a different contract than the one under test.
+
+        On a mismatch the key ranges that differ and the current entries in them are reported. Only the entries of those
+        ranges are fetched. A hex digest can't tell which entries differ.
+        """
+        if target_contract is None:
+            contract_hash = self.contract_hash
+        else:
+            contract_hash = target_contract
+        prefix = prefix or b""
+        actual = await compute_digest(await self.rpc_client(), contract_hash, prefix)
+
+        if isinstance(expected, pathlib.Path):
+            frame = inspect.stack()[1]
+            path = pathlib.Path(frame.filename).parent.joinpath(expected)
+            if os.environ.get(UPDATE_DIGESTS_ENV):
+                actual.save(path)
+                return
+            if not path.exists():
+                self.fail(
+                    f"golden storage digest {path} does not exist, run with {UPDATE_DIGESTS_ENV}=1 to record it"
+                )
+            expected = StorageDigest.load(path)
+        if isinstance(expected, str):
+            if actual.digest != expected:
+                self.fail(f"storage digest {actual.digest} != expected {expected}")
+            return
+        if actual.digest == expected.digest:
+            return
+
+        ranges = actual.differing_ranges(expected)
+        lines = [
+            f"storage ({actual.count} entries) differs from the expected state ({expected.count} entries) in "
+            f"{len(ranges)} key range(s)"
+        ]
+        rpc_client = await self.rpc_client()
+        for first, last in ranges[:MAX_REPORTED_RANGES]:
+            lines.append(f"{first.hex()}..{last.hex()}:")
+            async with contextlib.aclosing(
+                rpc_client.iter_storage(
+                    contract_hash,
+                    prefix,
+                    start_key=first,
+                    limit=MAX_REPORTED_ENTRIES + 1,
+                )
+            ) as entries:
+                i = 0
+                async for key, value in entries:
+                    if key > last:
+                        break
+                    if i == MAX_REPORTED_ENTRIES:
+                        lines.append("  ...")
+                        break
+                    lines.append(f"  {key.hex()}: {value.hex()}")
+                    i += 1
+                if i == 0:
+                    lines.append("  no entries")
+        self.fail("\n".join(lines))
+
+    @staticmethod
+    def _post_process_storage(
+        key: bytes,
+        value: bytes,
+        prefix: bytes,
+        remove_prefix: bool,
+        key_post_processor: Optional[PostProcessor],
+        values_post_processor: Optional[PostProcessor],
+    ) -> tuple[Any, Any]:
+        if remove_prefix and prefix:
+            key = key.removeprefix(prefix)
+        if key_post_processor is not None:
+            key = key_post_processor(key)
+        if values_post_processor is not None:
+            value = values_post_processor(value)
+        return key, value
+
+    @classmethod
+    async def call_many(
+        cls,
+        calls: Sequence[tuple[Optional[types.UInt160], str, Optional[list], Any]],
+        *,
+        signers: Optional[Sequence[Signer]] = None,
+        return_exceptions: bool = False,
+    ) -> list:
+        """
+        Test invoke several contract methods with a single script and return the result of each.
+
+        Args:
+            calls: `(target_contract, method, args, return_type)` entries. A `target_contract` of None calls the contract
+             under test. `return_type` is used like in `call()`.
+            signers: a list of custom signers.
+            return_exceptions: put the exception of a failed entry in its place in the results instead of raising it.
+
+        Notifications are not returned, use `call()` if they are needed. A fault stops the whole script, in that case
+        the entries are test invoked on their own to find the ones that fail.
+        """
+        signing_pairs = None
+        if signers is not None:
+            signing_pairs = list(map(lambda s: (no_signing(), s), signers))
+
+        methods = []
+        for target_contract, method, args, _ in calls:
+            if target_contract is None:
+                contract = GenericContract(cls.contract_hash)
+            else:
+                contract = GenericContract(target_contract)
+            methods.append(contract.call_function(method, args))
+        # concatenates the scripts and gives every call its own slice of the result stack
+        receipt: InvokeReceipt[Sequence] = await cls.node.facade.test_invoke_multi(
+            methods, signers=signing_pairs
+        )
+
+        results: list = []
+        if receipt.state == "HALT":
+            for result, (_, _, _, return_type) in zip(receipt.result, calls):
+                try:
+                    results.append(cls._unwrap(result, return_type))
+                except Exception as e:
+                    results.append(e)
+        else:
+            results = await cls.gather_calls(
+                calls, signers=signers, return_exceptions=True
+            )
+
+        if not return_exceptions:
+            cls._raise_first_exception([entry[1] for entry in calls], results)
         return results
 
+    @classmethod
+    async def gather_calls(
+        cls,
+        calls: Sequence[tuple[Optional[types.UInt160], str, Optional[list], Any]],
+        *,
+        signers: Optional[Sequence[Signer]] = None,
+        max_concurrency: int = DEFAULT_POOL_SIZE,
+        return_exceptions: bool = False,
+    ) -> list:
+        """
+        Test invoke contract methods concurrently and return the result of each in the order of `calls`.
+
+        Args:
+            calls: `(target_contract, method, args, return_type)` entries like for `call_many()`.
+            signers: a list of custom signers.
+            max_concurrency: maximum number of invocations in flight.
+            return_exceptions: put the exception of a failed entry (e.g. `AssertException`) in its place in the results
+             instead of raising it.
+
+        Unlike `call_many()` every entry runs in its own invocation. All entries run to completion before the
+        exception of the first failed entry is raised.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _call(target_contract, method, args, return_type):
+            async with semaphore:
+                value, _ = await cls.call(
+                    method,
+                    args,
+                    return_type=return_type,
+                    signers=signers,
+                    target_contract=target_contract,
+                )
+                return value
+
+        results = await asyncio.gather(
+            *(_call(*entry) for entry in calls), return_exceptions=True
+        )
+        if not return_exceptions:
+            cls._raise_first_exception([entry[1] for entry in calls], results)
+        return results
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def batch(
+        cls, *, return_exceptions: bool = False
+    ) -> AsyncIterator[TransactionBatch]:
+        """
+        Send transactions back to back and wait for all of them once on exit, instead of waiting for the block of every
+        transaction.
+
+        Args:
+            return_exceptions: put the exception of a failed transaction in its place in `results` instead of raising
+             it.
+
+        Example:
+            async with self.batch() as batch:
+                for user in users:
+                    await batch.transfer(GAS, owner.script_hash, user.script_hash, 10, 8)
+            self.assertTrue(all(success for success, _ in batch.results))
+        """
+        batch = TransactionBatch(cls)
+        try:
+            yield batch
+        except Exception:
+            # the transactions are sent already, let them settle before the next test reads the chain
+            await batch.wait(return_exceptions=True)
+            raise
+        await batch.wait(return_exceptions=return_exceptions)
+
+    @classmethod
+    async def submit_many(
+        cls,
+        calls: Sequence[
+            tuple[
+                Optional[types.UInt160],
+                str,
+                Optional[list],
+                Any,
+                Sequence[account.Account],
+            ]
+        ],
+        *,
+        return_exceptions: bool = False,
+    ) -> list:
+        """
+        Invoke contract methods in a `batch()` and return the `(value, notifications)` of each in the order of `calls`.
+
+        Args:
+            calls: `(target_contract, method, args, return_type, signing_accounts)` entries. A `target_contract` of None
+             calls the contract under test.
+            return_exceptions: put the exception of a failed entry in its place in the results instead of raising it.
+        """
+        async with cls.batch(return_exceptions=return_exceptions) as batch:
+            for target_contract, method, args, return_type, signing_accounts in calls:
+                await batch.call(
+                    method,
+                    args,
+                    return_type=return_type,
+                    signing_accounts=signing_accounts,
+                    target_contract=target_contract,
+                )
+        return batch.results
+
+    @staticmethod
+    def _signing_pairs(
+        signing_accounts: Sequence[account.Account],
+        signers: Optional[Sequence[Signer]] = None,
+    ) -> list:
+        if signers is not None and len(signers) != len(signing_accounts):
+            raise ValueError(f"signing_accounts and signers length must be equal")
+
+        signing_pairs = []
+        for i, signing_account in enumerate(signing_accounts):
+            if signers is None:
+                signer = Signer(signing_account.script_hash)
+            else:
+                # take it from the supplied list
+                signer = signers[i]
+            if signing_account.is_multisig:
+                signing_pairs.append(
+                    (sign_with_multisig_account(signing_account), signer)
+                )
+            else:
+                signing_pairs.append((sign_with_account(signing_account), signer))
+        return signing_pairs
+
+    @staticmethod
+    def _raise_first_exception(names: Sequence[str], results: list) -> None:
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                result.add_note(f"entry {i}: {names[i]}")
+                raise result
+
+    @staticmethod
+    def _unwrap(exec_result, return_type, idx: int = 0):
+        if return_type is str:
+            return unwrap.as_str(exec_result, idx)
+        elif return_type is int:
+            return unwrap.as_int(exec_result, idx)
+        elif return_type is bool:
+            return unwrap.as_bool(exec_result, idx)
+        elif return_type is dict:
+            return unwrap.as_dict(exec_result, idx)
+        elif return_type is list:
+            return unwrap.as_list(exec_result, idx)
+        elif return_type is types.UInt160:
+            return unwrap.as_uint160(exec_result, idx)
+        elif return_type is types.UInt256:
+            return unwrap.as_uint256(exec_result, idx)
+        elif return_type is bytes:
+            return unwrap.as_bytes(exec_result, idx)
+        elif return_type is cryptography.ECPoint:
+            return unwrap.as_public_key(exec_result, idx)
+        elif return_type is None:
+            return unwrap.as_none(exec_result, idx)
+        else:
+            raise ValueError(f"unsupported return_type: {return_type}")
+
     @classmethod
     def _check_vmstate(cls, receipt):
         try:
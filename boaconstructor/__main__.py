@@ -0,0 +1,45 @@
+import argparse
+import logging
+import sys
+from typing import Optional
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m boaconstructor")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="keep a node running that test runs attach to"
+    )
+    daemon_parser.add_argument("--config", default=None, help="node configuration")
+    group = daemon_parser.add_mutually_exclusive_group()
+    group.add_argument("--stop", action="store_true", help="stop the running daemon")
+    group.add_argument(
+        "--status", action="store_true", help="check if a daemon is running"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "daemon":
+        from boaconstructor import daemon
+
+        client = daemon.DaemonClient.from_state_file()
+        if args.status:
+            print("running" if client is not None else "not running")
+            return 0 if client is not None else 1
+        if args.stop:
+            if client is None:
+                print("not running")
+                return 1
+            client.request("shutdown")
+            return 0
+        if client is not None:
+            print("a daemon is already running")
+            return 1
+        logging.basicConfig(level=logging.INFO)
+        daemon.serve(args.config)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Send many transactions and wait for their blocks once.
+
+`SmartContractTestCase.call()`, `transfer()` and `deploy()` wait for the block of every transaction before returning. In a
+`SmartContractTestCase.batch()` the transactions are signed and sent back to back and the receipts are collected at the
+end, such that a series of transactions is usually included in a single block.
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Type
+from neo3.core import types
+from neo3.wallet import account
+from neo3.network.payloads.verification import Signer
+from neo3.api.wrappers import GenericContract, NEP17Contract
+
+if TYPE_CHECKING:
+    from boaconstructor import SmartContractTestCase
+
+
+class TransactionBatch:
+    """
+    Transactions sent within a `SmartContractTestCase.batch()` block.
+
+    The system fee of a transaction is estimated against the chain state at the time it is sent, which does not include
+    the earlier transactions of the batch. Pass `system_fee` for transactions that depend on an earlier one, e.g. spend
+    tokens received in the same batch.
+    """
+
+    def __init__(self, test_case: Type["SmartContractTestCase"]):
+        self._test_case = test_case
+        self._pending: list[tuple[types.UInt256, str, Any]] = []
+        #: `(value, notifications)` of every transaction in the order they were sent. Set when the batch completes.
+        self.results: list = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def call(
+        self,
+        method: str,
+        args: Optional[list] = None,
+        *,
+        return_type,
+        signing_accounts: Sequence[account.Account],
+        signers: Optional[Sequence[Signer]] = None,
+        target_contract: Optional[types.UInt160] = None,
+        system_fee: int = 0,
+        network_fee: int = 0,
+    ) -> types.UInt256:
+        """
+        Send a transaction calling `method` like `SmartContractTestCase.call()` with `signing_accounts` does and return
+        its hash.
+        """
+        test_case = self._test_case
+        if target_contract is None:
+            contract = GenericContract(test_case.contract_hash)
+        else:
+            contract = GenericContract(target_contract)
+        tx_hash = await test_case.node.facade.invoke_fast(
+            contract.call_function(method, args),
+            signers=test_case._signing_pairs(signing_accounts, signers),
+            system_fee=system_fee,
+            network_fee=network_fee,
+        )
+        self._pending.append((tx_hash, method, return_type))
+        return tx_hash
+
+    async def transfer(
+        self,
+        token: types.UInt160,
+        source: types.UInt160,
+        destination: types.UInt160,
+        amount: int,
+        decimals: int,
+        signing_account: Optional[account.Account] = None,
+        system_fee: int = 0,
+    ) -> types.UInt256:
+        """
+        Send a transaction transferring `amount` of NEP-17 `token` like `SmartContractTestCase.transfer()` and return
+        its hash.
+        """
+        test_case = self._test_case
+        if signing_account is None:
+            signing_account = test_case.node.account_committee
+        tx_hash = await test_case.node.facade.invoke_fast(
+            NEP17Contract(token).transfer_friendly(
+                source, destination, amount, decimals
+            ),
+            signers=test_case._signing_pairs([signing_account]),
+            system_fee=system_fee,
+        )
+        self._pending.append((tx_hash, "transfer", bool))
+        return tx_hash
+
+    async def wait(self, return_exceptions: bool = False) -> list:
+        """
+        Wait until all transactions sent so far are persisted and return their results. Called on exit of the
+        `SmartContractTestCase.batch()` block.
+        """
+        test_case = self._test_case
+        pending, self._pending = self._pending, []
+        client = await test_case.rpc_client()
+        delay, timeout = await test_case.node.facade._get_receipt_time_values()
+        receipts = await asyncio.gather(
+            *(
+                client.wait_for_transaction_receipt(
+                    tx_hash, timeout=timeout, retry_delay=delay
+                )
+                for tx_hash, _, _ in pending
+            ),
+            return_exceptions=True,
+        )
+
+        results: list = []
+        for receipt, (_, _, return_type) in zip(receipts, pending):
+            if isinstance(receipt, BaseException):
+                results.append(receipt)
+                continue
+            client.observe_block(receipt.included_in_block)
+            try:
+                test_case._check_vmstate(receipt.execution)
+                value = test_case._unwrap(receipt.execution, return_type)
+                results.append((value, receipt.execution.notifications))
+            except Exception as e:
+                results.append(e)
+        self.results.extend(results)
+
+        if not return_exceptions:
+            test_case._raise_first_exception(
+                [method for _, method, _ in pending], results
+            )
+        return results
@@ -0,0 +1,68 @@
+"""
+Cache for read-only requests.
+
+Test invocations and storage queries see the state of the last persisted block, so their results can't change until the
+chain height does. `ReadCache` keeps the most recently used results for the current height and drops all of them when a
+new height is seen.
+"""
+
+import collections
+from typing import Any, Hashable, Optional
+
+
+class ReadCache:
+    """
+    LRU cache of read results that is cleared when the chain height changes.
+    """
+
+    def __init__(self, maxsize: int):
+        """
+        Args:
+            maxsize: maximum number of results kept.
+        """
+        self.maxsize = maxsize
+        #: number of lookups that found a result and that didn't.
+        self.hits = 0
+        self.misses = 0
+        self._height: Optional[int] = None
+        self._entries: collections.OrderedDict[Hashable, Any] = (
+            collections.OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _at_height(self, height: int) -> None:
+        if height != self._height:
+            self._entries.clear()
+            self._height = height
+
+    def get(self, key: Hashable, height: int) -> Optional[Any]:
+        """
+        Return the result stored for `key` at `height`, or None.
+        """
+        self._at_height(height)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, height: int, value: Any) -> None:
+        """
+        Store the result for `key` read at `height`.
+        """
+        self._at_height(height)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop all results, e.g. after the chain state was restored to an earlier height. Keeps the counters.
+        """
+        self._entries.clear()
+        self._height = None
@@ -0,0 +1,255 @@
+"""
+Node configuration.
+
+`NodeConfig` describes changes to the base YAML configuration such that nodes can be tuned per test class without
+maintaining copies of the YAML file. Parsed configurations and decrypted wallets are cached, the latter on disk in a per
+user cache directory keyed by content hash so that they are shared between processes. A rendered configuration holds
+the ports and paths of one node, it is written to the work directory of the node instead.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import pathlib
+import stat
+import sys
+import tempfile
+import yaml
+from dataclasses import dataclass, field
+from typing import Optional
+from neo3.wallet import wallet, account, scrypt_parameters as scrypt
+
+
+def _user_cache_dir() -> pathlib.Path:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or pathlib.Path.home().joinpath(
+            "AppData", "Local"
+        )
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home().joinpath(
+            ".cache"
+        )
+    return pathlib.Path(base).joinpath("boaconstructor")
+
+
+CACHE_DIR = _user_cache_dir()
+
+#: log levels of neo-go, from most to least verbose.
+LOG_LEVELS = ("debug", "info", "warn", "error")
+
+
+@dataclass(frozen=True)
+class NodeConfig:
+    """
+    Overrides for the base node configuration. Fields that are not set keep the value of the base configuration.
+    """
+
+    #: time between blocks in milliseconds.
+    time_per_block: Optional[int] = None
+    #: maximum time between blocks in milliseconds when there are no transactions. Enables extensible block time.
+    max_time_per_block: Optional[int] = None
+    #: maximum number of transactions in the mempool.
+    mempool_size: Optional[int] = None
+    #: maximum GAS a test invocation (e.g. `call()` without signers) may consume.
+    max_gas_invoke: Optional[int] = None
+    #: hardfork name to activation height. Merged with the hardforks of the base configuration.
+    hardforks: dict[str, int] = field(default_factory=dict)
+    #: one of "inmemory", "boltdb" or "leveldb". On disk databases are stored in the work directory of the node.
+    db_type: Optional[str] = None
+    #: port for the RPC server. 0 picks a free port.
+    rpc_port: Optional[int] = None
+    #: port for the P2P server. 0 picks a free port.
+    p2p_port: Optional[int] = None
+    #: enable the Prometheus metrics server on this port.
+    prometheus_port: Optional[int] = None
+    #: enable the Pprof server on this port.
+    pprof_port: Optional[int] = None
+    #: one of "debug", "info", "warn" or "error". Runtime logs are logged at "info" and are not captured above it.
+    log_level: Optional[str] = None
+
+    def apply(self, config: dict) -> dict:
+        """
+        Return a copy of `config` with the overrides applied.
+        """
+        config = json.loads(json.dumps(config))
+        protocol = config["ProtocolConfiguration"]
+        data = config["ApplicationConfiguration"]
+
+        if self.time_per_block is not None:
+            protocol["TimePerBlock"] = f"{self.time_per_block}ms"
+        if self.max_time_per_block is not None:
+            protocol["MaxTimePerBlock"] = f"{self.max_time_per_block}ms"
+        if self.mempool_size is not None:
+            protocol["MemPoolSize"] = self.mempool_size
+        if self.hardforks:
+            protocol["Hardforks"] = {**protocol.get("Hardforks", {}), **self.hardforks}
+        if self.max_gas_invoke is not None:
+            data["RPC"]["MaxGasInvoke"] = self.max_gas_invoke
+        if self.db_type is not None:
+            if self.db_type not in ("inmemory", "boltdb", "leveldb"):
+                raise ValueError(f"unsupported db_type: {self.db_type}")
+            data["DBConfiguration"] = {"Type": self.db_type}
+        if self.rpc_port is not None:
+            host = data["RPC"]["Addresses"][0].rpartition(":")[0]
+            data["RPC"]["Addresses"] = [f"{host}:{self.rpc_port}"]
+        if self.p2p_port is not None:
+            data["P2P"]["Addresses"] = [f":{self.p2p_port}"]
+        if self.prometheus_port is not None:
+            data["Prometheus"] = {
+                "Enabled": True,
+                "Addresses": [f"127.0.0.1:{self.prometheus_port}"],
+            }
+        if self.log_level is not None:
+            if self.log_level not in LOG_LEVELS:
+                raise ValueError(f"unsupported log_level: {self.log_level}")
+            data["LogLevel"] = self.log_level
+        if self.pprof_port is not None:
+            data["Pprof"] = {
+                "Enabled": True,
+                "Addresses": [f"127.0.0.1:{self.pprof_port}"],
+            }
+        return config
+
+
+def load_config(path: str) -> dict:
+    """
+    Parse the YAML configuration at `path`. The result is cached until the file changes.
+
+    The returned dictionary is shared, do not modify it.
+    """
+    stat = os.stat(path)
+    return _load_config(
+        str(pathlib.Path(path).absolute()), stat.st_mtime_ns, stat.st_size
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _load_config(path: str, unused_mtime: int, unused_size: int) -> dict:
+    with open(path) as f:
+        return list(yaml.load_all(f, yaml.FullLoader))[0]
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _private_dir(path: pathlib.Path) -> pathlib.Path:
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if sys.platform != "win32":
+        st = os.lstat(path)
+        if (
+            not stat.S_ISDIR(st.st_mode)
+            or st.st_uid != os.getuid()
+            or st.st_mode & 0o077
+        ):
+            raise PermissionError(
+                f"cache directory {path} must be a directory owned by the current user with mode 0700"
+            )
+    return path
+
+
+def cache_dir(*parts: str) -> pathlib.Path:
+    """
+    Return the cache directory, or a sub directory of it, creating it if needed.
+
+    The cache holds private keys and files that are executed or unpickled. Every directory on the way is checked to be
+    owned by the current user and inaccessible to others.
+
+    Raises:
+        PermissionError: if a directory does not pass the check.
+    """
+    path = _private_dir(CACHE_DIR)
+    for part in parts:
+        path = _private_dir(path.joinpath(part))
+    return path
+
+
+def write_cache_file(path: pathlib.Path, data: bytes) -> None:
+    """
+    Write `data` to `path` in a directory returned by `cache_dir()`.
+    """
+    # write and rename such that concurrent processes never read a partially written file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_cache_file(name: str, data: bytes) -> pathlib.Path:
+    path = cache_dir().joinpath(name)
+    if not path.is_file():
+        write_cache_file(path, data)
+    return path
+
+
+def render_config(config: dict, path: pathlib.Path) -> pathlib.Path:
+    """
+    Write `config` as YAML to `path` and return the path.
+    """
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return path
+
+
+def account_to_json(acc: account.Account) -> dict:
+    """
+    Serialize the account including its private key in plain. Only meant for test keys that never leave the machine.
+    """
+    return {
+        "address": acc.address,
+        "label": acc.label,
+        "private_key": acc.private_key.hex() if acc.private_key else None,
+        "contract": acc.contract.to_json() if acc.contract else None,
+    }
+
+
+def account_from_json(data: dict) -> account.Account:
+    """
+    Deserialize an account created by `account_to_json()`. Does not require decrypting a key.
+    """
+    private_key = bytes.fromhex(data["private_key"]) if data["private_key"] else None
+    contract = None
+    if data["contract"] is not None:
+        contract = account.AccountContract.from_json(data["contract"])
+    return account.Account(
+        private_key=private_key,
+        watch_only=private_key is None,
+        address=data["address"],
+        label=data["label"],
+        contract_=contract,
+    )
+
+
+def load_wallet(path: pathlib.Path, password: str) -> wallet.Wallet:
+    """
+    Load the wallet at `path` and decrypt its keys with `password`.
+
+    The decrypted accounts are cached on disk keyed by the hash of the wallet and password, so the keys are decrypted
+    only once.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    name = f"wallet-{_content_hash(raw + password.encode())}.json"
+    cache_path = cache_dir().joinpath(name)
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        accounts = list(map(account_from_json, cached["accounts"]))
+        return wallet.Wallet(
+            scrypt_params=scrypt.ScryptParameters.from_json(cached["scrypt"]),
+            accounts=accounts,
+            default_account=accounts[cached["default"]],
+        )
+    except (OSError, ValueError, KeyError):
+        pass
+
+    data = json.loads(raw)
+    w = wallet.Wallet.from_json(data, passwords=[password] * len(data["accounts"]))
+    cached = {
+        "scrypt": w.scrypt.to_json(),
+        "accounts": list(map(account_to_json, w.accounts)),
+        "default": w.accounts.index(w.account_default),  # type: ignore
+    }
+    _write_cache_file(name, json.dumps(cached).encode())
+    return w
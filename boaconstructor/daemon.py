@@ -0,0 +1,362 @@
+"""
+Keep a warm node alive between test runs.
+
+Start the daemon with `python -m boaconstructor daemon`. While it runs, `SmartContractTestCase` attaches to its node
+instead of spawning a new one, which saves the node startup, genesis and wallet loading on every run. The daemon is
+controlled over a local TCP socket with JSON line requests, e.g. to create and roll back to checkpoints. Every request
+carries a token that the daemon publishes in its state file. The file is only readable by the user that started the
+daemon, so other local users can't control it.
+
+The daemon serves one test run at a time; use the parallel runner for concurrent runs.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import pathlib
+import re
+import secrets
+import shutil
+import socket
+import socketserver
+import threading
+import urllib.parse
+import uuid
+from typing import Any, Optional, cast
+from neo3.core import types
+from neo3.wallet import wallet
+from boaconstructor.config import (
+    account_to_json,
+    account_from_json,
+    cache_dir,
+    write_cache_file,
+)
+from boaconstructor.node import NeoGoNode, RuntimeLog
+
+log = logging.getLogger("boaconstructor.daemon")
+
+#: name of the file describing the running daemon, in the daemon directory of the cache.
+STATE_FILE_NAME = "daemon.json"
+
+# snapshots are passed between the daemon and its clients through the snapshot directory, by name only
+_SNAPSHOT_NAME = re.compile(r"[0-9a-f]{32}\.bolt")
+
+
+class DaemonError(Exception):
+    pass
+
+
+def state_file_path() -> pathlib.Path:
+    """
+    Get the location of the file describing the running daemon. Can be overridden with the BOACONSTRUCTOR_DAEMON_FILE
+    environment variable.
+    """
+    path = os.environ.get("BOACONSTRUCTOR_DAEMON_FILE")
+    return pathlib.Path(path) if path else cache_dir("daemon").joinpath(STATE_FILE_NAME)
+
+
+def snapshot_dir() -> pathlib.Path:
+    """
+    Get the directory that snapshots of the daemon node are saved to and loaded from.
+    """
+    return cache_dir("daemon", "snapshots")
+
+
+def _runtime_log_to_json(runtime_log: RuntimeLog) -> dict:
+    return {
+        "tx": str(runtime_log.txid),
+        "contract": str(runtime_log.contract),
+        "msg": runtime_log.msg,
+    }
+
+
+def _runtime_log_from_json(data: dict) -> RuntimeLog:
+    return RuntimeLog(
+        types.UInt256.from_string(data["tx"]),
+        types.UInt160.from_string(data["contract"]),
+        data["msg"],
+    )
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "_DaemonServer"
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                token = request.pop("token", None)
+                if not isinstance(token, str) or not hmac.compare_digest(
+                    token, self.server.token
+                ):
+                    self.wfile.write(b'{"error": "DaemonError: invalid token"}\n')
+                    return
+                response = {"result": self.server.dispatch(request)}
+            except Exception as e:
+                response = {"error": f"{e.__class__.__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class _DaemonServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+
+    def __init__(self, node: NeoGoNode, token: str, genesis: pathlib.Path):
+        super().__init__(("127.0.0.1", 0), _RequestHandler)
+        self.node = node
+        self.token = token
+        self.genesis = genesis
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _snapshot_path(name: Any) -> pathlib.Path:
+        if not isinstance(name, str) or not _SNAPSHOT_NAME.fullmatch(name):
+            raise ValueError(f"invalid snapshot name: {name!r}")
+        return snapshot_dir().joinpath(name)
+
+    def dispatch(self, request: dict) -> Any:
+        cmd = request["cmd"]
+        with self._lock:
+            if cmd == "ping":
+                return "pong"
+            elif cmd == "info":
+                accounts = self.node._genesis_accounts
+                return {
+                    "config_path": self.node.config_path,
+                    "rpc_host": self.node.facade.rpc_host,
+                    "accounts": list(map(account_to_json, accounts)),
+                    "default": accounts.index(self.node._genesis_default_account),  # type: ignore
+                    "committee": accounts.index(self.node.account_committee),
+                    "config": self.node._config,
+                }
+            elif cmd == "new_session":
+                # every session starts from genesis, like a node of its own would
+                self.node.new_session()
+                self.node.load_snapshot(self.genesis)
+            elif cmd == "checkpoint":
+                self.node.checkpoint()
+            elif cmd == "rollback":
+                self.node.rollback()
+            elif cmd == "save_snapshot":
+                self.node.save_snapshot(self._snapshot_path(request["name"]))
+            elif cmd == "load_snapshot":
+                self.node.load_snapshot(self._snapshot_path(request["name"]))
+            elif cmd == "has_checkpoint":
+                return self.node.has_checkpoint
+            elif cmd == "logs":
+                return list(map(_runtime_log_to_json, self.node.runtime_logs))
+            elif cmd == "collect_logs":
+                txid = request.get("txid")
+                runtime_logs = asyncio.run(
+                    self.node.collect_runtime_logs(
+                        txid=None if txid is None else types.UInt256.from_string(txid),
+                        tag=request.get("tag"),
+                    )
+                )
+                return list(map(_runtime_log_to_json, runtime_logs))
+            elif cmd == "clear_logs":
+                self.node.runtime_logs = []
+            elif cmd == "shutdown":
+                # shutdown() blocks until serve_forever() returns, which can't happen while handling this request
+                threading.Thread(target=self.shutdown).start()
+            else:
+                raise ValueError(f"unknown command: {cmd}")
+        return None
+
+
+def serve(
+    config_path: Optional[str] = None, state_file: Optional[pathlib.Path] = None
+) -> None:
+    """
+    Start a node and serve it until a shutdown request is received or the process is interrupted.
+
+    Args:
+        config_path: path to the node configuration. Uses the bundled unittest configuration if not set.
+        state_file: where to publish the address of the daemon. Defaults to `state_file_path()`.
+    """
+    state_file = state_file_path() if state_file is None else state_file
+    node = NeoGoNode(config_path, persistent=True)
+    node.start()
+    # the work directory of the node is private, clients can't replace the genesis snapshot
+    genesis = node.work_dir.joinpath("genesis.bolt")
+    node.save_snapshot(genesis)
+    token = secrets.token_hex(32)
+    try:
+        with _DaemonServer(node, token, genesis) as server:
+            host, port = cast(tuple[str, int], server.server_address[:2])
+            # created with mode 0600, only the current user can read the token
+            write_cache_file(
+                state_file,
+                json.dumps(
+                    {"pid": os.getpid(), "host": host, "port": port, "token": token}
+                ).encode(),
+            )
+            log.info(f"serving node {node.facade.rpc_host} on {host}:{port}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    finally:
+        state_file.unlink(missing_ok=True)
+        node.stop()
+
+
+class DaemonClient:
+    """
+    Client for the control socket of a daemon.
+    """
+
+    def __init__(self, host: str, port: int, token: str, timeout: float = 60.0):
+        self.address = (host, port)
+        self.token = token
+        self.timeout = timeout
+
+    @classmethod
+    def from_state_file(
+        cls, state_file: Optional[pathlib.Path] = None
+    ) -> Optional["DaemonClient"]:
+        """
+        Get a client for the running daemon, or None if no daemon is running.
+        """
+        state_file = state_file_path() if state_file is None else state_file
+        try:
+            with open(state_file) as f:
+                state = json.load(f)
+            client = cls(state["host"], state["port"], state["token"])
+            client.request("ping")
+            return client
+        except (OSError, ValueError, KeyError, DaemonError):
+            return None
+
+    def request(self, cmd: str, **params) -> Any:
+        with socket.create_connection(self.address, timeout=self.timeout) as s:
+            request = {"cmd": cmd, "token": self.token, **params}
+            s.sendall(json.dumps(request).encode() + b"\n")
+            with s.makefile("rb") as f:
+                line = f.readline()
+        if not line:
+            raise DaemonError("connection closed by the daemon")
+        response = json.loads(line)
+        if "error" in response:
+            raise DaemonError(response["error"])
+        return response["result"]
+
+
+class RemoteNode(NeoGoNode):
+    """
+    A node running in a daemon process.
+
+    Starting is a no-op because the daemon owns the node process, stopping only removes the local work directory.
+    """
+
+    def __init__(self, client: DaemonClient):
+        self.client = client
+        # the configuration, wallet and RPC address come from the daemon, see `_parse_config()`
+        self._info = client.request("info")
+        super().__init__(self._info["config_path"], persistent=True)
+        self.new_session()
+
+    def _parse_config(self):
+        info = self._info
+        self._config = info["config"]
+        accounts = list(map(account_from_json, info["accounts"]))
+        self._genesis_accounts = accounts
+        self._genesis_default_account = accounts[info["default"]]
+        self.account_committee = accounts[info["committee"]]
+        address = urllib.parse.urlsplit(info["rpc_host"])
+        self.rpc_host = cast(str, address.hostname)
+        self.rpc_port = cast(int, address.port)
+        self._pick_rpc_port = False
+        self._create_facade()
+
+    @classmethod
+    def connect(
+        cls, state_file: Optional[pathlib.Path] = None
+    ) -> Optional["RemoteNode"]:
+        """
+        Connect to the running daemon, or return None if no daemon is running.
+        """
+        client = DaemonClient.from_state_file(state_file)
+        if client is None:
+            return None
+        return cls(client)
+
+    @property  # type: ignore[override]
+    def runtime_logs(self) -> list[RuntimeLog]:
+        return list(map(_runtime_log_from_json, self.client.request("logs")))
+
+    @runtime_logs.setter
+    def runtime_logs(self, value: list[RuntimeLog]) -> None:
+        if len(value) > 0:
+            raise ValueError("runtime logs of a remote node can only be cleared")
+        self.client.request("clear_logs")
+
+    async def sync_runtime_logs(self, timeout: float = 10.0) -> None:
+        # the logs are read by the daemon, which syncs as part of collecting them
+        pass
+
+    async def collect_runtime_logs(
+        self, *, txid: Optional[types.UInt256] = None, tag: Optional[str] = None
+    ) -> list[RuntimeLog]:
+        runtime_logs = await asyncio.to_thread(
+            self.client.request,
+            "collect_logs",
+            txid=None if txid is None else str(txid),
+            tag=tag,
+        )
+        return list(map(_runtime_log_from_json, runtime_logs))
+
+    def new_session(self) -> None:
+        self.wallet = wallet.Wallet(
+            accounts=self._genesis_accounts,
+            default_account=self._genesis_default_account,
+        )
+        self.client.request("new_session")
+        self.facade.clear_fee_policy()
+
+    @property
+    def running(self) -> bool:
+        return True
+
+    @property
+    def has_checkpoint(self) -> bool:
+        return self.client.request("has_checkpoint")
+
+    def start(self, timeout: Optional[float] = None):
+        pass
+
+    async def start_async(self, timeout: Optional[float] = None):
+        pass
+
+    def stop(self):
+        self._close_work_dir()
+
+    def checkpoint(self) -> None:
+        self.client.request("checkpoint")
+
+    def rollback(self) -> None:
+        self.client.request("rollback")
+        self.facade.clear_fee_policy()
+
+    async def rollback_async(self) -> None:
+        await asyncio.to_thread(self.client.request, "rollback")
+        self.facade.clear_fee_policy()
+
+    def fork(self, count: int, timeout: Optional[float] = None) -> list[NeoGoNode]:
+        raise ValueError("a daemon node can't be forked, use save_snapshot() instead")
+
+    def save_snapshot(self, path: pathlib.Path) -> None:
+        name = f"{uuid.uuid4().hex}.bolt"
+        self.client.request("save_snapshot", name=name)
+        shutil.move(snapshot_dir().joinpath(name), path)
+
+    def load_snapshot(self, path: pathlib.Path) -> None:
+        name = f"{uuid.uuid4().hex}.bolt"
+        copy = snapshot_dir().joinpath(name)
+        shutil.copyfile(path, copy)
+        try:
+            self.client.request("load_snapshot", name=name)
+        finally:
+            copy.unlink(missing_ok=True)
+        self.facade.clear_fee_policy()
@@ -0,0 +1,128 @@
+"""
+Storage changes between two points of a test.
+
+`SmartContractTestCase.storage_diff()` records the storage of a contract as a baseline. `StorageBaseline.changes()` reads
+the storage again and compares it with the baseline page by page as the pages arrive. Pages that are unchanged are
+skipped as a whole and only the changed entries are post processed.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional, Type
+from neo3.core import types
+from boaconstructor.storage import PostProcessor
+
+if TYPE_CHECKING:
+    from boaconstructor import SmartContractTestCase
+
+
+@dataclass
+class StorageChanges:
+    #: entries that are not in the baseline.
+    added: dict[Any, Any] = field(default_factory=dict)
+    #: entries of the baseline that are gone.
+    removed: dict[Any, Any] = field(default_factory=dict)
+    #: key to `(old value, new value)` of the entries with a different value.
+    modified: dict[Any, tuple[Any, Any]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+class StorageBaseline:
+    """
+    The storage of a contract at the time it was recorded. Create it with `SmartContractTestCase.storage_diff()`.
+    """
+
+    def __init__(
+        self,
+        test_case: Type["SmartContractTestCase"],
+        contract_hash: types.UInt160,
+        prefix: bytes,
+        remove_prefix: bool,
+        key_post_processor: Optional[PostProcessor],
+        values_post_processor: Optional[PostProcessor],
+    ):
+        self._test_case = test_case
+        self.contract_hash = contract_hash
+        self.prefix = prefix
+        self._remove_prefix = remove_prefix
+        self._key_post_processor = key_post_processor
+        self._values_post_processor = values_post_processor
+        self._entries: list[tuple[bytes, bytes]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def record(self) -> None:
+        """
+        Read the storage and make it the baseline.
+        """
+        rpc_client = await self._test_case.rpc_client()
+        entries = []
+        async for pairs in rpc_client.iter_storage_pages(
+            self.contract_hash, self.prefix
+        ):
+            entries.extend(pairs)
+        self._entries = entries
+
+    async def changes(self, rebase: bool = False) -> StorageChanges:
+        """
+        Read the storage and return how it differs from the baseline.
+
+        Args:
+            rebase: make the current storage the baseline, such that the next call returns the changes since this one.
+        """
+        rpc_client = await self._test_case.rpc_client()
+        old = self._entries
+        i = 0
+        added: list[tuple[bytes, bytes]] = []
+        removed: list[tuple[bytes, bytes]] = []
+        modified: list[tuple[bytes, bytes, bytes]] = []
+        new_entries: list[tuple[bytes, bytes]] = []
+
+        # both sides are ordered by key, merge them one page at a time
+        async for page in rpc_client.iter_storage_pages(
+            self.contract_hash, self.prefix
+        ):
+            if rebase:
+                new_entries.extend(page)
+            if old[i : i + len(page)] == page:
+                i += len(page)
+                continue
+            for key, value in page:
+                while i < len(old) and old[i][0] < key:
+                    removed.append(old[i])
+                    i += 1
+                if i < len(old) and old[i][0] == key:
+                    if old[i][1] != value:
+                        modified.append((key, old[i][1], value))
+                    i += 1
+                else:
+                    added.append((key, value))
+        removed.extend(old[i:])
+        if rebase:
+            self._entries = new_entries
+
+        changes = StorageChanges()
+        for key, value in added:
+            key, value = self._post_process(key, value)
+            changes.added[key] = value
+        for key, value in removed:
+            key, value = self._post_process(key, value)
+            changes.removed[key] = value
+        for key, old_value, new_value in modified:
+            key, old_value = self._post_process(key, old_value)
+            if self._values_post_processor is not None:
+                new_value = self._values_post_processor(new_value)
+            changes.modified[key] = (old_value, new_value)
+        return changes
+
+    def _post_process(self, key: bytes, value: bytes) -> tuple[Any, Any]:
+        return self._test_case._post_process_storage(
+            key,
+            value,
+            self.prefix,
+            self._remove_prefix,
+            self._key_post_processor,
+            self._values_post_processor,
+        )
@@ -0,0 +1,129 @@
+"""
+Digests of contract storage for golden state checks.
+
+A `StorageDigest` is a SHA-256 hash over the key ordered storage entries, computed while the pages stream in. Next to
+the hash it keeps the hashes of chunks of entries. Chunk boundaries depend on the keys only, so a change to a few entries
+changes the hashes of the chunks they are in and no others. Comparing the chunks of two digests tells which key ranges
+differ without having the entries of the expected state.
+"""
+
+import hashlib
+import json
+import pathlib
+from dataclasses import dataclass, field
+from typing import Optional
+from neo3.core import types
+from boaconstructor.rpc import PooledRpcClient
+
+#: average number of entries per chunk.
+CHUNK_SIZE = 256
+
+
+@dataclass(frozen=True)
+class StorageChunk:
+    first_key: bytes
+    last_key: bytes
+    count: int
+    digest: str
+
+
+@dataclass
+class StorageDigest:
+    #: hex SHA-256 of all entries.
+    digest: str
+    #: number of entries.
+    count: int
+    chunks: list[StorageChunk] = field(default_factory=list)
+
+    def to_json(self) -> dict:
+        return {
+            "digest": self.digest,
+            "count": self.count,
+            "chunks": [
+                [c.first_key.hex(), c.last_key.hex(), c.count, c.digest]
+                for c in self.chunks
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "StorageDigest":
+        return cls(
+            data["digest"],
+            data["count"],
+            [
+                StorageChunk(bytes.fromhex(first), bytes.fromhex(last), count, digest)
+                for first, last, count, digest in data["chunks"]
+            ],
+        )
+
+    def save(self, path: pathlib.Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=1)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "StorageDigest":
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+    def differing_ranges(self, other: "StorageDigest") -> list[tuple[bytes, bytes]]:
+        """
+        Return the `(first key, last key)` ranges of the chunks that are not the same in both digests, merged where they
+        overlap and ordered by key.
+        """
+        mine = set(self.chunks)
+        theirs = set(other.chunks)
+        ranges = sorted(
+            (chunk.first_key, chunk.last_key)
+            for chunk in mine.symmetric_difference(theirs)
+        )
+        merged: list[tuple[bytes, bytes]] = []
+        for first, last in ranges:
+            if merged and first <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+            else:
+                merged.append((first, last))
+        return merged
+
+
+def _entry(key: bytes, value: bytes) -> bytes:
+    return len(key).to_bytes(4, "big") + key + len(value).to_bytes(4, "big") + value
+
+
+def _is_boundary(key: bytes) -> bool:
+    return int.from_bytes(hashlib.sha256(key).digest()[:4], "big") % CHUNK_SIZE == 0
+
+
+async def compute_digest(
+    rpc_client: PooledRpcClient, contract_hash: types.UInt160, prefix: bytes = b""
+) -> StorageDigest:
+    """
+    Hash the storage entries of a contract with keys starting with `prefix`. Only the current page of entries and the
+    chunk hashes are held in memory.
+    """
+    total = hashlib.sha256()
+    count = 0
+    chunks: list[StorageChunk] = []
+    chunk = hashlib.sha256()
+    first_key: Optional[bytes] = None
+    chunk_count = 0
+    key = b""
+    async for page in rpc_client.iter_storage_pages(contract_hash, prefix):
+        for key, value in page:
+            entry = _entry(key, value)
+            total.update(entry)
+            chunk.update(entry)
+            count += 1
+            chunk_count += 1
+            if first_key is None:
+                first_key = key
+            if _is_boundary(key):
+                chunks.append(
+                    StorageChunk(first_key, key, chunk_count, chunk.hexdigest())
+                )
+                chunk = hashlib.sha256()
+                first_key = None
+                chunk_count = 0
+    if first_key is not None:
+        chunks.append(StorageChunk(first_key, key, chunk_count, chunk.hexdigest()))
+    return StorageDigest(total.hexdigest(), count, chunks)
@@ -0,0 +1,244 @@
+"""
+Cache the chain state created by the class setup across test runs.
+
+Decorate the async class setup with `cached_setup` and the first run snapshots the node database after the setup
+completes. Later runs load that snapshot into the node and skip the setup. The cache entry of a setup is keyed by the
+source of the setup function and the node configuration, and is only used while the `.nef` and `.manifest.json` files
+deployed during the setup are unchanged.
+
+Only the setup function itself is hashed, changes to helpers it calls are not detected. Delete `FIXTURE_DIR` to
+invalidate all entries.
+"""
+
+import base64
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import pathlib
+import pickle
+import uuid
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Type
+from neo3.wallet import account
+from boaconstructor.config import (
+    CACHE_DIR,
+    account_from_json,
+    account_to_json,
+    cache_dir,
+    write_cache_file,
+)
+
+if TYPE_CHECKING:
+    from boaconstructor import SmartContractTestCase
+
+log = logging.getLogger("boaconstructor.fixture")
+
+FIXTURE_DIR = CACHE_DIR.joinpath("fixtures")
+
+# class attributes that belong to the harness and are never cached
+_IGNORED_ATTRIBUTES = {"node", "_at_checkpoint"}
+
+_CACHED_SETUP_ATTR = "_boaconstructor_cached_setup"
+
+# marks class attributes that did not exist before the setup
+_MISSING = object()
+
+# files deployed by the setup that is currently being recorded
+_artifacts: contextvars.ContextVar[Optional[list[pathlib.Path]]] = (
+    contextvars.ContextVar("artifacts", default=None)
+)
+
+
+def record_artifact(path: pathlib.Path) -> None:
+    """
+    Register a file that the chain state of the running setup depends on. Does nothing outside a cached setup.
+    """
+    paths = _artifacts.get()
+    if paths is not None:
+        paths.append(path)
+
+
+def cached_setup(
+    func: Callable[[Any], Awaitable[None]],
+) -> Callable[[Any], Awaitable[None]]:
+    """
+    Cache the chain state created by an async class setup across test runs.
+
+    The class attributes assigned by the setup and the accounts it adds to the wallet are restored together with the
+    chain state. Attribute values must be picklable.
+
+    Example:
+        class MyTest(SmartContractTestCase):
+            @classmethod
+            def setUpClass(cls) -> None:
+                super().setUpClass()
+                asyncio.run(cls.asyncSetupClass())
+
+            @classmethod
+            @cached_setup
+            async def asyncSetupClass(cls) -> None:
+                cls.owner = cls.node.wallet.account_new("owner")
+                cls.contract_hash = await cls.deploy("./resources/contract.nef", cls.owner)
+    """
+
+    @functools.wraps(func)
+    async def wrapper(cls):
+        entry = _FixtureEntry(cls, _setup_key(cls, func))
+        if entry.restore():
+            log.debug(f"restored setup of {cls.__qualname__} from {entry.path}")
+            return
+
+        attributes_before = dict(vars(cls))
+        artifacts: list[pathlib.Path] = []
+        token = _artifacts.set(artifacts)
+        try:
+            await func(cls)
+        finally:
+            _artifacts.reset(token)
+        entry.store(attributes_before, artifacts)
+
+    setattr(wrapper, _CACHED_SETUP_ATTR, True)
+    return wrapper
+
+
+def is_cached_setup(cls) -> bool:
+    """
+    Return True if the `asyncSetupClass` of `cls` is decorated with `cached_setup`.
+    """
+    return getattr(getattr(cls, "asyncSetupClass", None), _CACHED_SETUP_ATTR, False)
+
+
+def _file_hash(path: pathlib.Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _setup_key(cls, func) -> str:
+    node = cls.node
+    h = hashlib.sha256()
+    h.update(f"{cls.__module__}.{cls.__qualname__}".encode())
+    h.update(inspect.getsource(func).encode())
+    # the snapshot is only valid for the chain it was taken from
+    h.update(json.dumps(node._config, sort_keys=True).encode())
+    h.update(str(node.on_demand_blocks).encode())
+    for binary in sorted(pathlib.Path(__file__).parent.joinpath("data").glob("neogo*")):
+        stat = binary.stat()
+        h.update(f"{binary.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return h.hexdigest()[:32]
+
+
+class _FixtureEntry:
+    """
+    A cache entry consists of a JSON file describing the setup result and the database snapshot it refers to.
+    Snapshots get a unique name such that concurrent runs storing the same entry don't mix up files.
+    """
+
+    def __init__(self, cls: Type["SmartContractTestCase"], key: str):
+        self.cls = cls
+        self.node = cls.node
+        # entries are unpickled, only read them from a directory private to the current user
+        self.dir = cache_dir(FIXTURE_DIR.name)
+        self.path = self.dir.joinpath(f"{key}.json")
+
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load(self) -> Optional[dict]:
+        """
+        Read the entry if it is still valid.
+        """
+        data = self._read()
+        if data is None:
+            return None
+        try:
+            for path, digest in data["artifacts"].items():
+                if _file_hash(pathlib.Path(path)) != digest:
+                    return None
+            if not self.dir.joinpath(data["snapshot"]).is_file():
+                return None
+            return data
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def restore(self) -> bool:
+        data = self._load()
+        if data is None:
+            return False
+        try:
+            values = {
+                name: pickle.loads(base64.b64decode(value["pickle"]))
+                for name, value in data["attributes"].items()
+                if "pickle" in value
+            }
+        except Exception as e:
+            log.warning(f"ignoring cached setup of {self.cls.__qualname__}: {e}")
+            return False
+
+        self.node.load_snapshot(self.dir.joinpath(data["snapshot"]))
+        if self.cls.read_cache is not None:
+            self.cls.read_cache.clear()
+
+        wallet = self.node.wallet
+        for acc_data in data["accounts"]:
+            acc = account_from_json(acc_data)
+            # an account created before the setup with the same label (e.g. in `setUpClass`) has a different key than
+            # the one the snapshot was created with
+            for existing in list(wallet.accounts):
+                if existing.address == acc.address or (
+                    acc.label is not None and existing.label == acc.label
+                ):
+                    wallet.account_delete(existing)
+            wallet.account_add(acc)
+
+        addresses = {acc.address: acc for acc in wallet.accounts}
+        for name, value in data["attributes"].items():
+            if "account" in value:
+                setattr(self.cls, name, addresses[value["account"]])
+            else:
+                setattr(self.cls, name, values[name])
+        return True
+
+    def store(
+        self, attributes_before: dict[str, Any], artifacts: list[pathlib.Path]
+    ) -> None:
+        wallet = self.node.wallet
+        genesis = {acc.address for acc in self.node._genesis_accounts}
+        accounts = [acc for acc in wallet.accounts if acc.address not in genesis]
+        addresses = {acc.address for acc in wallet.accounts}
+
+        attributes: dict[str, dict] = {}
+        for name, value in vars(self.cls).items():
+            if name in _IGNORED_ATTRIBUTES:
+                continue
+            if isinstance(value, account.Account) and value.address in addresses:
+                # accounts are restored through the wallet, refer to them such that they stay the same object
+                attributes[name] = {"account": value.address}
+            elif attributes_before.get(name, _MISSING) is not value:
+                try:
+                    attributes[name] = {
+                        "pickle": base64.b64encode(pickle.dumps(value)).decode()
+                    }
+                except Exception as e:
+                    log.warning(
+                        f"not caching setup of {self.cls.__qualname__}, attribute {name} can't be pickled: {e}"
+                    )
+                    return
+
+        previous = self._read()
+        snapshot = f"{self.path.stem}-{uuid.uuid4().hex}.bolt"
+        self.node.save_snapshot(self.dir.joinpath(snapshot))
+        data = {
+            "snapshot": snapshot,
+            "artifacts": {str(path.absolute()): _file_hash(path) for path in artifacts},
+            "accounts": list(map(account_to_json, accounts)),
+            "attributes": attributes,
+        }
+        write_cache_file(self.path, json.dumps(data).encode())
+        if previous is not None and "snapshot" in previous:
+            self.dir.joinpath(previous["snapshot"]).unlink(missing_ok=True)
@@ -1,54 +1,283 @@
+import asyncio
+import atexit
+import collections
+import copy
+import dataclasses
 import json
+import os
 import pathlib
+import shutil
+import signal
+import socket
+import tempfile
 import threading
+import time
 import subprocess
+import uuid
 import shlex
 import logging
 import sys
-import time
-import yaml
 import platform
-import re
 from neo3.core import types
 from neo3.wallet import wallet, account
-from neo3.api.wrappers import ChainFacade
+from neo3 import vm
+from neo3.api.wrappers import ContractMethodResult, InvokeReceipt
+from neo3.api.helpers.signing import sign_with_multisig_account
+from neo3.network.payloads.verification import Signer
 from neo3.api.helpers.txbuilder import START_IGNORE_RUNTIMELOG, STOP_IGNORE_RUNTIMELOG
-from typing import Optional
-from dataclasses import dataclass
+from typing import Any, Optional
+from boaconstructor.config import (
+    NodeConfig,
+    load_config,
+    load_wallet,
+    render_config,
+)
+from boaconstructor.rpc import (
+    DEFAULT_BATCH_WINDOW,
+    DEFAULT_POOL_SIZE,
+    PooledChainFacade,
+    PooledRpcClient,
+)
 
 
 log = logging.getLogger("neogo")
 log.addHandler(logging.StreamHandler(sys.stdout))
 
-RE_RUNTIME_LOG = re.compile(r"INFO\truntime log\t(\{.*})")
+# the node logs in JSON. Lines are filtered on these byte strings before anything is decoded
+RUNTIME_LOG_MARKER = b'"msg":"runtime log"'
+READY_MARKER = b"RPC server already started"
+RPC_START_MARKER = b'"msg":"starting rpc-server"'
+START_IGNORE_MARKER = f'"msg":"{START_IGNORE_RUNTIMELOG}"'.encode()
+STOP_IGNORE_MARKER = f'"msg":"{STOP_IGNORE_RUNTIMELOG}"'.encode()
+TX_FIELD = b'"tx":"'
 
-RE_CAPTURE_START_IGNORE_MARKER = re.compile(
-    r"INFO\truntime log\t{\"tx\": \"(.*?)\", \"script\": \".*?\", \"msg\": \""
-    + START_IGNORE_RUNTIMELOG
-    + '"'
-)
+# runtime log messages logged by the harness itself. A tag identifies the logs of a test invocation, a sync message tells
+# that all logs printed before it have been read.
+HARNESS_LOG_PREFIX = "boaconstructor:"
+TAG_LOG_PREFIX = HARNESS_LOG_PREFIX + "tag:"
+SYNC_LOG_PREFIX = HARNESS_LOG_PREFIX + "sync:"
+HARNESS_MARKER = f'"msg":"{HARNESS_LOG_PREFIX}'.encode()
 
-RE_CAPTURE_STOP_IGNORE_MARKER = re.compile(
-    r"INFO\truntime log\t{\"tx\": \"(.*?)\", \"script\": \".*?\", \"msg\": \""
-    + STOP_IGNORE_RUNTIMELOG
-    + '"'
-)
+# a separate process group on Windows allows for a graceful shutdown via CTRL_BREAK_EVENT
+if sys.platform == "win32":
+    _CREATION_FLAGS = subprocess.CREATE_NEW_PROCESS_GROUP
+    _INTERRUPT_SIGNAL = signal.CTRL_BREAK_EVENT
+else:
+    _CREATION_FLAGS = 0
+    _INTERRUPT_SIGNAL = signal.SIGINT
+
+# maximum number of bytes to take from the stdout pipe at once
+READ_SIZE = 1 << 16
+
+# neo-go hangs without a word if its RPC port is taken, instead of logging the ready message right after starting the
+# RPC server. Seconds to wait for that message before assuming the port is taken.
+RPC_LISTEN_TIMEOUT = 2.0
+# number of free ports tried before giving up. Another process can take a port between picking and binding it.
+RPC_PORT_ATTEMPTS = 3
+
+
+class NodeStartupError(Exception):
+    """
+    The node exited or did not become ready in time during startup.
+    """
+
+    def __init__(self, message: str, output: str):
+        super().__init__(f"{message}\n{output}" if output else message)
+        #: what the node printed before the failure
+        self.output = output
 
 
-@dataclass
 class RuntimeLog:
-    txid: types.UInt256
-    contract: types.UInt160
-    msg: str
+    """
+    A message logged by a contract.
+
+    Logs read from the node keep the raw log record and only decode it when one of the fields is accessed.
+    """
+
+    __slots__ = ("_record", "_txid", "_contract", "_msg")
+
+    def __init__(self, txid: types.UInt256, contract: types.UInt160, msg: str):
+        self._record: Optional[bytes] = None
+        self._txid = txid
+        self._contract = contract
+        self._msg = msg
+
+    @classmethod
+    def from_record(cls, record: bytes) -> "RuntimeLog":
+        """
+        Create a log from a JSON log record of the node without decoding it.
+        """
+        runtime_log = cls.__new__(cls)
+        runtime_log._record = record
+        return runtime_log
+
+    def _decode(self) -> None:
+        record = self._record
+        if record is None:
+            return
+        # the message of the record and the message logged by the contract share the "msg" key. The latter comes last
+        # and thus wins
+        data = json.loads(record)
+        self._txid = types.UInt256.from_string(data["tx"])
+        self._contract = types.UInt160.from_string(data["script"])
+        self._msg = data["msg"]
+        self._record = None
+
+    @property
+    def txid(self) -> types.UInt256:
+        self._decode()
+        return self._txid
+
+    @property
+    def contract(self) -> types.UInt160:
+        self._decode()
+        return self._contract
+
+    @property
+    def msg(self) -> str:
+        self._decode()
+        return self._msg
+
+    def json(self) -> Any:
+        """
+        Decode the message as JSON, e.g. for lists and dictionaries logged by the contract.
+        """
+        return json.loads(self.msg)
+
+    def __eq__(self, other):
+        if not isinstance(other, RuntimeLog):
+            return NotImplemented
+        return (self.txid, self.contract, self.msg) == (
+            other.txid,
+            other.contract,
+            other.msg,
+        )
 
+    def __repr__(self):
+        return f"RuntimeLog(txid={self.txid!r}, contract={self.contract!r}, msg={self.msg!r})"
+
+
+def _tx_key(record: bytes) -> str:
+    """
+    Get the transaction hash from a runtime log record without decoding the record.
+    """
+    start = record.find(TX_FIELD) + len(TX_FIELD)
+    return record[start : record.index(b'"', start)].decode().removeprefix("0x")
+
+
+def _log_script(msg: str) -> bytes:
+    sb = vm.ScriptBuilder()
+    sb.emit_push(msg)
+    sb.emit_syscall(vm.Syscalls.SYSTEM_RUNTIME_LOG)
+    return sb.to_array()
+
+
+class _RotatingFile:
+    """
+    A binary file that is rotated like `logging.handlers.RotatingFileHandler` does.
+    """
+
+    def __init__(self, path: pathlib.Path, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+
+    def write(self, data: bytes) -> None:
+        if self._size > 0 and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        # the file is meant for post-mortem analysis, don't lose output if the test process dies
+        self._file.flush()
+        self._size += len(data)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._file = open(self.path, "wb")
+        self._size = 0
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ports handed out to nodes of this process, to avoid giving the same free port to two nodes
+_allocated_ports: set[int] = set()
+
+
+def _find_free_port(host: str) -> int:
+    """
+    Find a TCP port on `host` that is not in use.
+    """
+    while True:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind((host, 0))
+            port = s.getsockname()[1]
+        if port not in _allocated_ports:
+            _allocated_ports.add(port)
+            return port
+
+
+# session wide nodes shared between test cases, keyed by configuration path and node options
+_shared_nodes: dict[tuple[str, tuple], "NeoGoNode"] = {}
+
+# block time settings of a node that only produces blocks when there are transactions. A block is sealed shortly after a
+# transaction arrives, an empty block is only produced after the maximum time.
+ON_DEMAND_TIME_PER_BLOCK = "10ms"
+ON_DEMAND_MAX_TIME_PER_BLOCK = "1h"
+
+
+class _NodeBase:
+    """
+    Configuration, RPC access and runtime log handling shared by `NeoGoNode` and `AsyncNeoGoNode`. The subclasses
+    implement running the node process and reading its output.
+    """
 
-class NeoGoNode:
     wallet: wallet.Wallet
     account_committee: account.Account
-    facade: ChainFacade
-    runtime_logs: list[RuntimeLog]
+    facade: PooledChainFacade
+    rpc_host: str
+    rpc_port: int
+    _pick_rpc_port: bool
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        *,
+        persistent: bool = False,
+        start_timeout: float = 30.0,
+        on_demand_blocks: bool = False,
+        config: Optional[NodeConfig] = None,
+        snapshot: Optional[pathlib.Path] = None,
+        log_file: Optional[pathlib.Path] = None,
+        log_file_max_bytes: int = 10 * 1024 * 1024,
+        log_file_backup_count: int = 3,
+        rpc_pool_size: int = DEFAULT_POOL_SIZE,
+        rpc_batch_window: Optional[float] = DEFAULT_BATCH_WINDOW,
+    ):
+        """
+        Args:
+            config_path: path to the node configuration. Uses the bundled unittest configuration if not set.
+            persistent: store the chain in an on disk database instead of in memory. Required for `checkpoint()`.
+            start_timeout: maximum time in seconds to wait for the node to become ready.
+            on_demand_blocks: only produce a block when a transaction is waiting in the mempool instead of every
+             `TimePerBlock`. This makes state persisting calls return as soon as the transaction is processed. Use
+             `produce_block()` to get a block without sending a transaction of your own.
+            config: overrides for the configuration at `config_path`.
+            snapshot: start from the chain state in a database created by `save_snapshot()`. Requires `persistent`.
+            log_file: write the full output of the node to this file for post-mortem analysis. The file is rotated once
+             it exceeds `log_file_max_bytes`, keeping `log_file_backup_count` old files as `<log_file>.1` etc. Use
+             `NodeConfig(log_level=...)` to control how much is logged.
+            rpc_pool_size: maximum number of concurrent RPC connections per event loop.
+            rpc_batch_window: time in seconds to collect concurrent read-only RPC requests into one batch request.
+             None disables batching.
+        """
         self.data_dir = pathlib.Path(__file__).parent.joinpath("data")
         if config_path is None:
             self.config_path = str(self.data_dir.joinpath("protocol.unittest.yml"))
@@ -59,96 +288,928 @@ class NeoGoNode:
                 "wallet1_solo.json"
             )
         self.system = platform.system().lower()
-        self._thread: Optional[threading.Thread] = None
-        self._process: Optional[subprocess.Popen[str]] = None
         self._ready = False
+        # the output of the node while starting, to report why it failed to start
+        self._startup_output: collections.deque[str] = collections.deque(maxlen=100)
         self._terminate = False
+        # False while runtime logs are ignored, see `START_IGNORE_RUNTIMELOG`
+        self._capture = True
+        self.start_timeout = start_timeout
+        self.persistent = persistent
+        self.on_demand_blocks = on_demand_blocks
+        self.config = NodeConfig() if config is None else config
+        self.log_file = log_file
+        self.log_file_max_bytes = log_file_max_bytes
+        self.log_file_backup_count = log_file_backup_count
+        self.rpc_pool_size = rpc_pool_size
+        self.rpc_batch_window = rpc_batch_window
+        self._open_work_dir()
+        self.rendered_config_path: Optional[pathlib.Path] = None
+        self._runtime_logs: list[RuntimeLog] = []
+        self._runtime_logs_by_tx: dict[str, list[RuntimeLog]] = {}
+        # test invocation tag to the hash of the transaction the node executed it in
+        self._tagged_txs: dict[str, str] = {}
+        self._sync_waiters: dict[str, threading.Event | asyncio.Event] = {}
+        if snapshot is not None:
+            if not persistent:
+                raise ValueError("starting from a snapshot requires a persistent node")
+            shutil.copyfile(snapshot, self.db_path)
         self._parse_config()
-        self.runtime_logs = []
+        level = self._config["ApplicationConfiguration"].get("LogLevel", "info")
+        #: runtime logs and the message that tells the node is ready are logged at info level
+        self.captures_runtime_logs = level in ("debug", "info")
 
-    def start(self):
-        log.debug("starting")
+    def _open_work_dir(self) -> None:
+        # holds the rendered configuration and the database files of the node
+        self._work_dir: Optional[tempfile.TemporaryDirectory] = (
+            tempfile.TemporaryDirectory(prefix="neogo-")
+        )
+        self.work_dir = pathlib.Path(self._work_dir.name)
 
+    def _close_work_dir(self) -> None:
+        if self._work_dir is not None:
+            self._work_dir.cleanup()
+            self._work_dir = None
+
+    @property
+    def db_path(self) -> pathlib.Path:
+        return self.work_dir.joinpath("chain.bolt")
+
+    def _command(self) -> list[str]:
         prog = "neogo"
         posix = True
         if self.system == "windows":
             prog += ".exe"
             posix = False
 
-        cmd = f"{self.data_dir}/{prog} node --config-file {self.config_path} --relative-path {self.data_dir}"
+        relative_path = pathlib.Path(self.config_path).parent
+        cmd = f"{self.data_dir}/{prog} node --config-file {self.rendered_config_path} --relative-path {relative_path}"
+        return shlex.split(cmd, posix=posix)
+
+    def _reset_startup(self) -> None:
+        self._ready = False
+        self._rpc_port_taken = False
+        self._startup_output.clear()
+        self._terminate = False
+        self._capture = True
+        # the node may restart from a snapshot with another fee policy
+        self.facade.clear_fee_policy()
+
+    def _on_ready(self) -> None:
+        raise NotImplementedError
+
+    def _on_rpc_starting(self) -> None:
+        raise NotImplementedError
+
+    def _retry_rpc_port(self, attempt: int) -> bool:
+        """
+        Pick a new RPC port if the last start failed because the port was taken. False if it can't be retried.
+        """
+        if (
+            not self._rpc_port_taken
+            or not self._pick_rpc_port
+            or attempt + 1 >= RPC_PORT_ATTEMPTS
+        ):
+            return False
+        log.debug(f"RPC port {self.rpc_port} is taken, retrying with another port")
+        self.rpc_port = _find_free_port(self.rpc_host)
+        self._create_facade()
+        return True
+
+    def _rpc_port_error(self) -> NodeStartupError:
+        return NodeStartupError(
+            f"RPC port {self.rpc_port} is in use", "".join(self._startup_output)
+        )
+
+    def _process_lines(self, lines: list[bytes]) -> None:
+        for line in lines:
+            if not self._ready:
+                self._startup_output.append(
+                    line.decode("utf-8", errors="replace") + "\n"
+                )
+                if READY_MARKER in line:
+                    self._ready = True
+                    self._on_ready()
+                elif RPC_START_MARKER in line:
+                    self._on_rpc_starting()
+            if RUNTIME_LOG_MARKER not in line:
+                continue
+            if HARNESS_MARKER in line:
+                self._process_harness_log(line)
+            elif START_IGNORE_MARKER in line:
+                self._capture = False
+            elif STOP_IGNORE_MARKER in line:
+                self._capture = True
+            elif self._capture:
+                self._add_runtime_log(_tx_key(line), RuntimeLog.from_record(line))
+
+    def _open_log_file(self) -> Optional["_RotatingFile"]:
+        if self.log_file is None:
+            return None
+        return _RotatingFile(
+            self.log_file, self.log_file_max_bytes, self.log_file_backup_count
+        )
+
+    def _rpc_port_open(self) -> bool:
+        try:
+            with socket.create_connection((self.rpc_host, self.rpc_port), timeout=0.1):
+                return True
+        except OSError:
+            return False
+
+    def _add_runtime_log(self, tx: str, runtime_log: RuntimeLog) -> None:
+        self._runtime_logs.append(runtime_log)
+        self._runtime_logs_by_tx.setdefault(tx, []).append(runtime_log)
+
+    def _process_harness_log(self, record: bytes) -> None:
+        try:
+            msg = json.loads(record)["msg"]
+        except ValueError:
+            return
+        if msg.startswith(TAG_LOG_PREFIX):
+            self._tagged_txs[msg.removeprefix(TAG_LOG_PREFIX)] = _tx_key(record)
+        elif msg.startswith(SYNC_LOG_PREFIX):
+            event = self._sync_waiters.get(msg.removeprefix(SYNC_LOG_PREFIX))
+            if event is not None:
+                event.set()
+
+    async def rpc_client(self) -> PooledRpcClient:
+        """
+        Get the RPC client of the node for the running event loop. Its connections are kept alive and shared with the
+        facade, do not close it.
+        """
+        return await self.facade.pool.client()
+
+    @property
+    def runtime_logs(self) -> list[RuntimeLog]:
+        """
+        All runtime logs in the order they were logged. Assign an empty list to clear them.
+        """
+        return self._runtime_logs
+
+    @runtime_logs.setter
+    def runtime_logs(self, value: list[RuntimeLog]) -> None:
+        by_tx: dict[str, list[RuntimeLog]] = {}
+        for runtime_log in value:
+            by_tx.setdefault(str(runtime_log.txid), []).append(runtime_log)
+        self._runtime_logs_by_tx = by_tx
+        self._runtime_logs = value
+
+    @staticmethod
+    def tag_script(script: bytes) -> tuple[str, bytes]:
+        """
+        Prefix `script` with a log message that identifies the test invocation it is executed in, such that its logs can
+        be collected with `collect_runtime_logs(tag=...)`.
+
+        Returns:
+            the tag and the tagged script.
+        """
+        tag = uuid.uuid4().hex
+        return tag, _log_script(TAG_LOG_PREFIX + tag) + script
+
+    async def sync_runtime_logs(self, timeout: float = 10.0) -> None:
+        """
+        Wait until all runtime logs printed by the node so far have been read.
+
+        Raises:
+            TimeoutError: if the logs are not read within `timeout` seconds.
+            ValueError: if the node does not log runtime logs.
+        """
+        raise NotImplementedError
+
+    async def collect_runtime_logs(
+        self, *, txid: Optional[types.UInt256] = None, tag: Optional[str] = None
+    ) -> list[RuntimeLog]:
+        """
+        Get the runtime logs of a persisted transaction or of a test invocation. Waits for the logs to be read first.
+
+        Args:
+            txid: hash of a persisted transaction.
+            tag: tag of a test invocation of a script created with `tag_script()`.
+        """
+        if (txid is None) == (tag is None):
+            raise ValueError("specify either txid or tag")
+
+        await self.sync_runtime_logs()
+        if tag is not None:
+            key = self._tagged_txs.pop(tag, None)
+            if key is None:
+                return []
+        else:
+            key = str(txid)
+        return list(self._runtime_logs_by_tx.get(key, []))
+
+    async def produce_block(self) -> int:
+        """
+        Get a new block persisted by sending a transaction that does nothing. Mainly useful for nodes with
+        `on_demand_blocks` enabled, other nodes produce blocks by themselves.
+
+        Returns:
+            the index of the block that the transaction got included in.
+        """
+        sb = vm.ScriptBuilder().emit(vm.OpCode.PUSHT)
+        receipt: InvokeReceipt[None] = await self.facade.invoke(
+            ContractMethodResult(sb.to_array()),
+            signers=[
+                (
+                    sign_with_multisig_account(self.account_committee),
+                    Signer(self.account_committee.script_hash),
+                )
+            ],
+        )
+        return receipt.included_in_block
+
+    def _write_config(self):
+        config = copy.deepcopy(self._config)
+        if self.on_demand_blocks:
+            protocol = config["ProtocolConfiguration"]
+            protocol["TimePerBlock"] = ON_DEMAND_TIME_PER_BLOCK
+            protocol["MaxTimePerBlock"] = ON_DEMAND_MAX_TIME_PER_BLOCK
+        data = config["ApplicationConfiguration"]
+        data["RPC"]["Addresses"] = [f"{self.rpc_host}:{self.rpc_port}"]
+        data["LogEncoding"] = "json"
+        if self.persistent:
+            data["DBConfiguration"] = {
+                "Type": "boltdb",
+                "BoltDBOptions": {"FilePath": str(self.db_path)},
+            }
+        else:
+            # keep on disk databases of nodes running side by side apart
+            db = data.setdefault("DBConfiguration", {"Type": "inmemory"})
+            if db["Type"] == "boltdb":
+                db["BoltDBOptions"] = {"FilePath": str(self.db_path)}
+            elif db["Type"] == "leveldb":
+                db["LevelDBOptions"] = {
+                    "DataDirectoryPath": str(self.work_dir.joinpath("chain.leveldb"))
+                }
+        self.rendered_config_path = render_config(
+            config, self.work_dir.joinpath("protocol.yml")
+        )
+
+    def _parse_config(self):
+        self._config = self.config.apply(load_config(self.config_path))
+        data = self._config["ApplicationConfiguration"]
+        consensus_wallet_password = data["Consensus"]["UnlockWallet"]["Password"]
+        self.wallet = load_wallet(self.consensus_wallet_path, consensus_wallet_password)
+        self.wallet.accounts[0].label = "committee-signature"
+        self.wallet.accounts[1].label = "committee"
+        self.account_committee = self.wallet.accounts[1]
+        self.account_committee = self.wallet.import_multisig_address(
+            1, [self.wallet.account_default.public_key]  # type: ignore
+        )
+        self._genesis_accounts = list(self.wallet.accounts)
+        self._genesis_default_account = self.wallet.account_default
+
+        # neo-go does not report the port it binds to when using port 0, so we pick a free port ourselves. Another
+        # process may take it before the node binds it, in which case startup is retried with a new port.
+        host, _, port = data["RPC"]["Addresses"][0].rpartition(":")
+        self.rpc_host = host if host else "127.0.0.1"
+        self.rpc_port = int(port)
+        self._pick_rpc_port = self.rpc_port == 0
+        if self._pick_rpc_port:
+            self.rpc_port = _find_free_port(self.rpc_host)
+        self._create_facade()
+
+    def _create_facade(self) -> None:
+        rpc_host = f"http://{self.rpc_host}:{self.rpc_port}"
+        if self.on_demand_blocks:
+            # the receipt polling values are derived from the block time by default. With on demand blocks a
+            # transaction is included within milliseconds, but an idle node does not produce blocks to wait for.
+            self.facade = PooledChainFacade(
+                rpc_host=rpc_host,
+                receipt_retry_delay=0.005,
+                receipt_timeout=10,
+                pool_size=self.rpc_pool_size,
+                batch_window=self.rpc_batch_window,
+            )
+        else:
+            self.facade = PooledChainFacade(
+                rpc_host=rpc_host,
+                pool_size=self.rpc_pool_size,
+                batch_window=self.rpc_batch_window,
+            )
+        self.facade._emit_log_marker = True
+
+
+class NeoGoNode(_NodeBase):
+    """
+    A node whose output is read by a thread, such that it can be started and stopped outside an event loop.
+    """
+
+    _thread: Optional[threading.Thread] = None
+    _process: Optional["subprocess.Popen[bytes]"] = None
+    # set by the stdout reader once the node is ready or exited
+    _startup_done: threading.Event
+
+    @property
+    def checkpoint_path(self) -> pathlib.Path:
+        return self.work_dir.joinpath("checkpoint.bolt")
+
+    @classmethod
+    def shared(cls, config_path: Optional[str] = None, **kwargs) -> "NeoGoNode":
+        """
+        Get the session wide node for `config_path` and the node options in `kwargs`.
+
+        The first call creates and starts the node, later calls return the already running instance. The node is
+        stopped once when the interpreter exits.
+
+        Args:
+            config_path: path to the node configuration. Uses the bundled unittest configuration if not set.
+            kwargs: options passed to `NeoGoNode()`.
+        """
+        key = (
+            str(pathlib.Path(config_path).absolute()) if config_path else "",
+            # repr because option values such as a NodeConfig are not necessarily hashable
+            tuple(sorted((name, repr(value)) for name, value in kwargs.items())),
+        )
+        node = _shared_nodes.get(key)
+        if node is None:
+            node = cls(config_path, **kwargs)
+            node.start()
+            _shared_nodes[key] = node
+            atexit.register(node.stop)
+        return node
+
+    def new_session(self) -> None:
+        """
+        Reset the state that belongs to the consumer of the node, not to the chain.
+
+        The wallet is restored to only hold the accounts from the consensus wallet and the runtime logs are cleared.
+        Chain state (e.g. deployed contracts and balances) is left untouched, but a checkpoint is discarded.
+        """
+        self.wallet = wallet.Wallet(
+            accounts=self._genesis_accounts,
+            default_account=self._genesis_default_account,
+        )
+        self.runtime_logs = []
+        self.checkpoint_path.unlink(missing_ok=True)
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def has_checkpoint(self) -> bool:
+        return self.checkpoint_path.is_file()
+
+    def start(self, timeout: Optional[float] = None):
+        """
+        Start the node and wait until it is ready to serve RPC requests.
+
+        Args:
+            timeout: maximum time in seconds to wait for the node to become ready. Defaults to `start_timeout`.
+
+        Raises:
+            NodeStartupError: if the node exits, is not ready within `timeout` or its RPC port is in use. A port picked
+             by the node is picked again a few times first.
+        """
+        timeout = self.start_timeout if timeout is None else timeout
+        for attempt in range(RPC_PORT_ATTEMPTS):
+            self._spawn()
+            try:
+                self._check_started(self._startup_done.wait(timeout), timeout)
+                return
+            except NodeStartupError:
+                if not self._retry_rpc_port(attempt):
+                    raise
+
+    async def start_async(self, timeout: Optional[float] = None):
+        """
+        Start the node without blocking the event loop while waiting for it to become ready.
+
+        See Also:
+            `start()`
+        """
+        timeout = self.start_timeout if timeout is None else timeout
+        for attempt in range(RPC_PORT_ATTEMPTS):
+            self._spawn()
+            started = await asyncio.to_thread(self._startup_done.wait, timeout)
+            try:
+                self._check_started(started, timeout)
+                return
+            except NodeStartupError:
+                if not self._retry_rpc_port(attempt):
+                    raise
+
+    def _check_started(self, startup_done: bool, timeout: float) -> None:
+        if self._ready:
+            log.debug("running")
+            return
+        if self._rpc_port_taken:
+            # the hanging node does not respond to an interrupt
+            if self._process is not None:
+                self._process.kill()
+            self._stop_process()
+            raise self._rpc_port_error()
+        output = "".join(self._startup_output)
+        if startup_done:
+            returncode = None if self._process is None else self._process.wait()
+            self._stop_process()
+            raise NodeStartupError(
+                f"node exited during startup with code {returncode}", output
+            )
+        self._stop_process()
+        raise NodeStartupError(f"node did not become ready within {timeout}s", output)
+
+    def _reset_startup(self) -> None:
+        super()._reset_startup()
+        self._startup_done = threading.Event()
+
+    def _on_ready(self) -> None:
+        self._startup_done.set()
+
+    def _on_rpc_starting(self) -> None:
+        startup_done = self._startup_done
+
+        def check():
+            # ignore a timer of an earlier start
+            if startup_done is self._startup_done and not self._ready:
+                self._rpc_port_taken = True
+                startup_done.set()
+
+        timer = threading.Timer(RPC_LISTEN_TIMEOUT, check)
+        timer.daemon = True
+        timer.start()
+
+    def _poll_ready(self, process: subprocess.Popen) -> None:
+        # the ready message is not logged below info level, wait for the RPC server to accept connections instead
+        while process.poll() is None and not self._ready:
+            if self._rpc_port_open():
+                self._ready = True
+                self._on_ready()
+                return
+            time.sleep(0.02)
+
+    def _spawn(self):
+        log.debug("starting")
+        if self._work_dir is None:
+            self._open_work_dir()
+        self._reset_startup()
+        self._write_config()
 
         self._process = subprocess.Popen(
-            shlex.split(cmd, posix=posix),
+            self._command(),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            bufsize=1,
-            text=True,
             shell=False,
+            creationflags=_CREATION_FLAGS,
         )
 
-        def process_stdout(process):
-            capture = True
-            for output in iter(process.stdout.readline, b""):
-                if "RPC server already started" in output:
-                    self._ready = True
-                    # WARNING: do not terminate this loop. stdout must be read as long as the process lives otherwise
-                    # we'll eventually hit the PIPE buffer limit and hang the child process.
-                if RE_CAPTURE_START_IGNORE_MARKER.match(output) is not None:
-                    capture = False
-                elif RE_CAPTURE_STOP_IGNORE_MARKER.match(output) is not None:
-                    capture = True
-                elif (match := RE_RUNTIME_LOG.match(output)) is not None and capture:
-                    logline = json.loads(match.group(1))
-                    txid = types.UInt256.from_string(logline["tx"])
-                    contract = types.UInt160.from_string(logline["script"])
-                    msg = logline["msg"]
-                    self.runtime_logs.append(RuntimeLog(txid, contract, msg))
+        def process_stdout(process, log_file):
+            pending = b""
+            # take whatever is available instead of reading line by line, most reads then return many lines at once
+            while chunk := process.stdout.read1(READ_SIZE):
+                # WARNING: do not terminate this loop once ready. stdout must be read as long as the process lives
+                # otherwise we'll eventually hit the PIPE buffer limit and hang the child process.
+                if log_file is not None:
+                    log_file.write(chunk)
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                self._process_lines(lines)
                 if self._terminate:
                     break
+            if log_file is not None:
+                log_file.close()
+            # wake up anyone waiting for the node to start if it exited
+            self._startup_done.set()
 
-        self._thread = threading.Thread(target=process_stdout, args=(self._process,))
+        if not self.captures_runtime_logs:
+            threading.Thread(
+                target=self._poll_ready, args=(self._process,), daemon=True
+            ).start()
+
+        # a daemon thread, the interpreter joins other threads before it runs the `atexit` hook that stops a shared node
+        self._thread = threading.Thread(
+            target=process_stdout,
+            args=(self._process, self._open_log_file()),
+            daemon=True,
+        )
         self._thread.start()
 
-        while not self._ready:
-            time.sleep(0.0001)
-        log.debug("running")
+    async def sync_runtime_logs(self, timeout: float = 10.0) -> None:
+        if not self.captures_runtime_logs:
+            raise ValueError("runtime logs are not captured above info level")
+        token = uuid.uuid4().hex
+        event = threading.Event()
+        self._sync_waiters[token] = event
+        try:
+            await self.facade.test_invoke(
+                ContractMethodResult(_log_script(SYNC_LOG_PREFIX + token))
+            )
+            if not event.is_set() and not await asyncio.to_thread(event.wait, timeout):
+                raise TimeoutError(f"runtime logs were not read within {timeout}s")
+        finally:
+            del self._sync_waiters[token]
 
     def stop(self):
+        """
+        Stop the node and remove its work directory, which includes the chain of a persistent node and its checkpoint.
+        Starting the node again begins with a new work directory.
+        """
+        self._stop_process()
+        self._close_work_dir()
+
+    def _stop_process(self) -> None:
         log.debug("stopping")
-        if self._process is not None:
-            self._process.kill()
-            self._process.wait()
+        process = self._process
+        if process is not None:
+            if self.persistent and process.poll() is None:
+                # neo-go only flushes the database to disk periodically, a graceful shutdown persists everything
+                process.send_signal(_INTERRUPT_SIGNAL)
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            else:
+                process.kill()
+            process.wait()
+            self._process = None
 
         if self._thread is not None and self._thread.is_alive():
             self._terminate = True
+            self._thread.join()
+        self._thread = None
+        if process is not None and process.stdout is not None:
+            process.stdout.close()
         log.debug("stopped")
 
-    def reset(self):
-        # neo-go uses an in memory database so there's no need to reset anything
-        pass
+    def checkpoint(self) -> None:
+        """
+        Save the current chain state such that it can be restored with `rollback()`.
 
-    def _parse_config(self):
-        with open(self.config_path) as f:
-            config: dict = list(yaml.load_all(f, yaml.FullLoader))[0]
-            data = config["ApplicationConfiguration"]
-
-            consensus_wallet_password = data["Consensus"]["UnlockWallet"]["Password"]
-            self.wallet = wallet.Wallet.from_file(
-                str(self.consensus_wallet_path.absolute()),
-                passwords=[
-                    consensus_wallet_password,
-                    consensus_wallet_password,
-                ],
+        The node is briefly restarted to get a consistent copy of the database.
+
+        Raises:
+            ValueError: if the node is not persistent.
+        """
+        self.save_snapshot(self.checkpoint_path)
+
+    def rollback(self) -> None:
+        """
+        Restore the chain state saved by the last `checkpoint()`.
+
+        Raises:
+            ValueError: if no checkpoint exists.
+        """
+        if not self.has_checkpoint:
+            raise ValueError("no checkpoint to roll back to")
+        self.load_snapshot(self.checkpoint_path)
+
+    async def rollback_async(self) -> None:
+        """
+        Restore the chain state saved by the last `checkpoint()` without blocking the event loop while the node
+        restarts.
+
+        See Also:
+            `rollback()`
+        """
+        if not self.has_checkpoint:
+            raise ValueError("no checkpoint to roll back to")
+        running = self.running
+        if running:
+            await asyncio.to_thread(self._stop_process)
+        await asyncio.to_thread(shutil.copyfile, self.checkpoint_path, self.db_path)
+        if running:
+            await self.start_async()
+
+    def save_snapshot(self, path: pathlib.Path) -> None:
+        """
+        Copy the chain database to `path`. Unlike a checkpoint the snapshot can outlive the node.
+
+        Raises:
+            ValueError: if the node is not persistent.
+        """
+        if not self.persistent:
+            raise ValueError("snapshots require a persistent node")
+        running = self.running
+        if running:
+            self._stop_process()
+        shutil.copyfile(self.db_path, path)
+        if running:
+            self.start()
+
+    def load_snapshot(self, path: pathlib.Path) -> None:
+        """
+        Replace the chain database with a snapshot created by `save_snapshot()`.
+
+        Raises:
+            ValueError: if the node is not persistent.
+        """
+        if not self.persistent:
+            raise ValueError("snapshots require a persistent node")
+        running = self.running
+        if running:
+            self._stop_process()
+        shutil.copyfile(path, self.db_path)
+        if running:
+            self.start()
+
+    def fork(self, count: int, timeout: Optional[float] = None) -> list["NeoGoNode"]:
+        """
+        Create and start `count` nodes that continue from the current chain state of this node.
+
+        Every fork starts from a copy of the database, has its own work directory, freshly picked RPC and P2P ports and a
+        copy of the wallet. The other node options are the same, except that a `log_file` gets a `.fork<n>` suffix and
+        the Prometheus and Pprof servers enabled through `NodeConfig` are left disabled. This is much faster than
+        repeating an expensive setup for every node, e.g. to give parallel workers an identical chain. Stopping the
+        forks is the responsibility of the caller.
+
+        Args:
+            count: number of nodes to create.
+            timeout: maximum time in seconds to wait for a fork to become ready. Defaults to `start_timeout`.
+
+        Raises:
+            ValueError: if the node is not persistent.
+            NodeStartupError: if a fork fails to start.
+        """
+        snapshot = self.work_dir.joinpath("fork.bolt")
+        self.save_snapshot(snapshot)
+        # a port pinned by the configuration can only be bound by one node
+        config = dataclasses.replace(
+            self.config, rpc_port=0, p2p_port=0, prometheus_port=None, pprof_port=None
+        )
+        forks = [
+            type(self)(
+                self.config_path,
+                persistent=True,
+                start_timeout=self.start_timeout,
+                on_demand_blocks=self.on_demand_blocks,
+                config=config,
+                snapshot=snapshot,
+                log_file=(
+                    None
+                    if self.log_file is None
+                    else self.log_file.with_name(
+                        f"{self.log_file.stem}.fork{i}{self.log_file.suffix}"
+                    )
+                ),
+                log_file_max_bytes=self.log_file_max_bytes,
+                log_file_backup_count=self.log_file_backup_count,
+                rpc_pool_size=self.rpc_pool_size,
+                rpc_batch_window=self.rpc_batch_window,
             )
-            self.wallet.accounts[0].label = "committee-signature"
-            self.wallet.accounts[1].label = "committee"
-            self.account_committee = self.wallet.accounts[1]
-            self.account_committee = self.wallet.import_multisig_address(
-                1, [self.wallet.account_default.public_key]  # type: ignore
+            for i in range(count)
+        ]
+        snapshot.unlink()
+        # start all forks before waiting for any of them
+        for node in forks:
+            node.wallet = wallet.Wallet(
+                accounts=list(self.wallet.accounts),
+                default_account=self.wallet.account_default,
             )
+            node._spawn()
+        try:
+            for node in forks:
+                node_timeout = node.start_timeout if timeout is None else timeout
+                try:
+                    node._check_started(
+                        node._startup_done.wait(node_timeout), node_timeout
+                    )
+                except NodeStartupError:
+                    if not node._retry_rpc_port(0):
+                        raise
+                    node.start(node_timeout)
+        except NodeStartupError:
+            for node in forks:
+                node.stop()
+            raise
+        return forks
+
+    def reset(self):
+        """
+        Roll back to the last checkpoint if there is one.
+
+        A node without checkpoint uses an in memory database or is discarded after use, so there's nothing to reset.
+        """
+        if self.has_checkpoint:
+            self.rollback()
+
+
+class AsyncNeoGoNode(_NodeBase):
+    """
+    A node driven by asyncio instead of a reader thread.
+
+    The node process and its output are handled by the event loop the node is started in, which means runtime logs can
+    be awaited without any cross thread handoff. As a consequence the node must be started, used and stopped within one
+    event loop, e.g. in `asyncSetUp()`/`asyncTearDown()` or with `async with AsyncNeoGoNode() as node:`.
+
+    Checkpoints, snapshots and forks restart the node synchronously and are only available on `NeoGoNode`.
+    """
+
+    def __init__(self, config_path: Optional[str] = None, **kwargs):
+        super().__init__(config_path, **kwargs)
+        self._aprocess: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._ready_poller: Optional[asyncio.Task] = None
+        self._rpc_listen_timer: Optional[asyncio.TimerHandle] = None
+        self._aready = asyncio.Event()
+        # replaced by a new event every time logs arrive, such that waiters don't need to poll
+        self._logs_arrived = asyncio.Event()
+        self._queues: list[asyncio.Queue[RuntimeLog]] = []
+
+    async def __aenter__(self) -> "AsyncNeoGoNode":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._aprocess is not None and self._aprocess.returncode is None
+
+    async def start(self, timeout: Optional[float] = None) -> None:
+        """
+        Start the node and wait until it is ready to serve RPC requests.
+
+        Args:
+            timeout: maximum time in seconds to wait for the node to become ready. Defaults to `start_timeout`.
+
+        Raises:
+            NodeStartupError: if the node exits, is not ready within `timeout` or its RPC port is in use. A port picked
+             by the node is picked again a few times first.
+        """
+        timeout = self.start_timeout if timeout is None else timeout
+        for attempt in range(RPC_PORT_ATTEMPTS):
+            try:
+                await self._start(timeout)
+                return
+            except NodeStartupError:
+                if not self._retry_rpc_port(attempt):
+                    raise
+
+    async def _start(self, timeout: float) -> None:
+        log.debug("starting")
+        if self._work_dir is None:
+            self._open_work_dir()
+        self._reset_startup()
+        self._aready.clear()
+        self._write_config()
+        self._aprocess = await asyncio.create_subprocess_exec(
+            *self._command(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            creationflags=_CREATION_FLAGS,
+        )
+        self._reader = asyncio.create_task(
+            self._read_stdout(self._aprocess, self._open_log_file())
+        )
+        if not self.captures_runtime_logs:
+            self._ready_poller = asyncio.create_task(self._apoll_ready(self._aprocess))
+        try:
+            await asyncio.wait_for(self._aready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self._rpc_listen_timer is not None:
+            self._rpc_listen_timer.cancel()
+            self._rpc_listen_timer = None
+        if self._ready:
+            log.debug("running")
+            return
+        if self._rpc_port_taken:
+            # the hanging node does not respond to an interrupt
+            self._aprocess.kill()
+            await self._stop_process()
+            raise self._rpc_port_error()
 
-            # TODO: warn if port is :0 because then we can't tell where the RPC server is running on
-            address = data["RPC"]["Addresses"][0]
-            host = f"http://{address}"
-            self.facade = ChainFacade(rpc_host=host)
-            self.facade._emit_log_marker = True
+        output = "".join(self._startup_output)
+        returncode = self._aprocess.returncode
+        await self._stop_process()
+        if returncode is not None:
+            raise NodeStartupError(
+                f"node exited during startup with code {returncode}", output
+            )
+        raise NodeStartupError(f"node did not become ready within {timeout}s", output)
+
+    def _on_ready(self) -> None:
+        self._aready.set()
+
+    def _on_rpc_starting(self) -> None:
+        def check():
+            self._rpc_listen_timer = None
+            if not self._ready:
+                self._rpc_port_taken = True
+                self._aready.set()
+
+        self._rpc_listen_timer = asyncio.get_running_loop().call_later(
+            RPC_LISTEN_TIMEOUT, check
+        )
+
+    async def _apoll_ready(self, process: asyncio.subprocess.Process) -> None:
+        while process.returncode is None and not self._ready:
+            if await asyncio.to_thread(self._rpc_port_open):
+                self._ready = True
+                self._on_ready()
+                return
+            await asyncio.sleep(0.02)
+
+    async def _read_stdout(
+        self, process: asyncio.subprocess.Process, log_file: Optional[_RotatingFile]
+    ) -> None:
+        assert process.stdout is not None
+        pending = b""
+        # the same as the reader thread of `NeoGoNode`, stdout must be read as long as the process lives
+        while chunk := await process.stdout.read(READ_SIZE):
+            if log_file is not None:
+                log_file.write(chunk)
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            self._process_lines(lines)
+            if self._logs_arrived.is_set():
+                self._logs_arrived = asyncio.Event()
+        if log_file is not None:
+            log_file.close()
+        await process.wait()
+        # wake up anyone waiting for the node to start
+        self._aready.set()
+
+    def _add_runtime_log(self, tx: str, runtime_log: RuntimeLog) -> None:
+        super()._add_runtime_log(tx, runtime_log)
+        for queue in self._queues:
+            queue.put_nowait(runtime_log)
+        self._logs_arrived.set()
+
+    async def stop(self) -> None:
+        """
+        Stop the node and remove its work directory. Starting the node again begins with a new work directory.
+        """
+        await self._stop_process()
+        self._close_work_dir()
+
+    async def _stop_process(self) -> None:
+        log.debug("stopping")
+        process = self._aprocess
+        if process is not None:
+            if self.persistent and process.returncode is None:
+                # neo-go only flushes the database to disk periodically, a graceful shutdown persists everything
+                process.send_signal(_INTERRUPT_SIGNAL)
+                try:
+                    await asyncio.wait_for(process.wait(), 10)
+                except asyncio.TimeoutError:
+                    process.kill()
+            elif process.returncode is None:
+                process.kill()
+            await process.wait()
+            self._aprocess = None
+        if self._reader is not None:
+            await self._reader
+            self._reader = None
+        if self._ready_poller is not None:
+            await self._ready_poller
+            self._ready_poller = None
+        log.debug("stopped")
+
+    def subscribe(self) -> "asyncio.Queue[RuntimeLog]":
+        """
+        Get a queue that receives every runtime log read from now on. Stop receiving logs with `unsubscribe()`.
+        """
+        queue: asyncio.Queue[RuntimeLog] = asyncio.Queue()
+        self._queues.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: "asyncio.Queue[RuntimeLog]") -> None:
+        self._queues.remove(queue)
+
+    async def wait_for_runtime_logs(
+        self, txid: types.UInt256, count: int = 1, timeout: float = 10.0
+    ) -> list[RuntimeLog]:
+        """
+        Wait until at least `count` runtime logs of transaction `txid` are read.
+
+        Unlike `collect_runtime_logs()` this does not need a request to the node, but the number of logs to expect must
+        be known.
+
+        Raises:
+            TimeoutError: if the logs don't arrive within `timeout` seconds.
+        """
+        key = str(txid)
+
+        async def wait():
+            while len(self._runtime_logs_by_tx.get(key, [])) < count:
+                await self._logs_arrived.wait()
+
+        try:
+            await asyncio.wait_for(wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"expected {count} runtime log(s) for {txid} within {timeout}s"
+            ) from None
+        return list(self._runtime_logs_by_tx[key])
+
+    async def sync_runtime_logs(self, timeout: float = 10.0) -> None:
+        if not self.captures_runtime_logs:
+            raise ValueError("runtime logs are not captured above info level")
+        token = uuid.uuid4().hex
+        event = asyncio.Event()
+        self._sync_waiters[token] = event
+        try:
+            await self.facade.test_invoke(
+                ContractMethodResult(_log_script(SYNC_LOG_PREFIX + token))
+            )
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"runtime logs were not read within {timeout}s"
+            ) from None
+        finally:
+            del self._sync_waiters[token]
@@ -0,0 +1,705 @@
+"""
+Pooled RPC clients.
+
+`NeoRpcClient` and `ChainFacade` open a new HTTP session for every request. The clients here keep their connections
+alive and are shared by all requests made from the same event loop. An HTTP session can't be used outside the event loop
+that created it and `IsolatedAsyncioTestCase` runs every test in a new event loop, so there is one client per event
+loop. A client is closed automatically when its event loop shuts down.
+
+Read-only requests that are made concurrently, e.g. `call()`s run with `asyncio.gather()`, are collected for a short
+window and sent as a single JSON-RPC batch request.
+
+Transactions are assembled with as few requests as possible. The chain height is followed through a websocket
+subscription to new blocks and the network fee of standard and multi-signature accounts is calculated locally. The
+node version and the fee policy are read once per node.
+"""
+
+import asyncio
+import base64
+import logging
+import random
+import socket
+from collections.abc import AsyncGenerator, AsyncIterator, Sequence
+from typing import Any, Optional
+import aiohttp
+from neo3 import vm
+from neo3.api import noderpc
+from neo3.api.helpers import txbuilder, unwrap
+from neo3.api.wrappers import (
+    ChainFacade,
+    ContractMethodResult,
+    InvokeReceipt,
+    PolicyContract,
+    ReturnType,
+    SigningPair,
+)
+from neo3.contracts import utils as contract_utils
+from neo3.core import types
+from neo3.network.payloads import transaction, verification
+
+log = logging.getLogger("boaconstructor.rpc")
+
+#: default maximum number of connections per event loop.
+DEFAULT_POOL_SIZE = 10
+#: seconds an RPC request may take.
+DEFAULT_RPC_TIMEOUT = 10.0
+#: seconds an idle connection is kept open.
+KEEPALIVE_TIMEOUT = 60.0
+#: default time in seconds to collect read-only requests for a batch. With 0 the requests made until the event loop
+#: runs its next iteration are batched, which adds no noticeable latency to a single request.
+DEFAULT_BATCH_WINDOW = 0.0
+#: maximum number of requests per batch. A full batch is sent right away.
+MAX_BATCH_SIZE = 50
+#: methods that don't change state and can be sent as part of a batch.
+BATCH_METHODS = frozenset(
+    {
+        "invokescript",
+        "invokefunction",
+        "getstorage",
+        "findstates",
+        "findstorage",
+        "getblockcount",
+        "getcontractstate",
+        "getnep17balances",
+        "getapplicationlog",
+        "gettransactionheight",
+    }
+)
+
+#: blocks a transaction stays valid, the same as `TxBuilder.set_valid_until_block()` uses.
+VALID_UNTIL_BLOCKS = 1500
+#: methods of the PolicyContract that change the values the network fee is calculated from.
+FEE_POLICY_SETTERS = (b"setFeePerByte", b"setExecFeeFactor")
+
+# prices of the instructions executed by standard verification scripts, see `Helper.CalculateNetworkFee()` of the
+# reference implementation
+_PUSHDATA1_PRICE = 1 << 3
+_PUSHINT_PRICE = 1 << 0
+_SYSCALL_PRICE = 0
+_CHECK_SIG_PRICE = 1 << 15
+
+
+def _verification_cost(script: bytes) -> Optional[int]:
+    """
+    Execution cost of a standard verification script before applying the exec fee factor. None for other scripts.
+    """
+    if contract_utils.is_signature_contract(script):
+        return _PUSHDATA1_PRICE * 2 + _SYSCALL_PRICE + _CHECK_SIG_PRICE
+    valid, m, public_keys = contract_utils.parse_as_multisig_contract(script)
+    if valid:
+        n = len(public_keys)
+        return (
+            _PUSHDATA1_PRICE * (m + n)
+            + _PUSHINT_PRICE * 2
+            + _SYSCALL_PRICE
+            + _CHECK_SIG_PRICE * n
+        )
+    return None
+
+
+def calculate_network_fee(
+    tx: transaction.Transaction, fee_per_byte: int, exec_fee_factor: int
+) -> Optional[int]:
+    """
+    Calculate the network fee of a signed transaction without asking the node.
+
+    Returns None if the fee can't be calculated locally, i.e. the transaction has attributes or a witness that is not a
+    standard or multi-signature account.
+    """
+    if len(tx.attributes) > 0 or len(tx.witnesses) != len(tx.signers):
+        return None
+    fee = len(tx.to_array()) * fee_per_byte
+    for witness in tx.witnesses:
+        cost = _verification_cost(witness.verification_script)
+        if cost is None:
+            return None
+        fee += cost * exec_fee_factor
+    return fee
+
+
+class PooledRpcClient(noderpc.NeoRpcClient):
+    """
+    A `NeoRpcClient` that keeps its connections alive and batches read-only requests. It is shared, closing it is a
+    no-op.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        pool_size: int,
+        timeout: float,
+        batch_window: Optional[float] = DEFAULT_BATCH_WINDOW,
+    ):
+        # the base class creates a session without a connection limit and keep-alive settings
+        self.url = host
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self._batch: list[tuple[dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._batch_tasks: set[asyncio.Task] = set()
+        #: number of batch requests sent and the number of requests they contained.
+        self.batches_sent = 0
+        self.batched_requests = 0
+        self._block_count: Optional[int] = None
+        self._block_watcher: Optional[asyncio.Task] = None
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            connector=aiohttp.TCPConnector(
+                family=socket.AF_INET,
+                limit=pool_size,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ),
+        )
+
+    async def _do_post(
+        self,
+        method: str,
+        params: Optional[list] = None,
+        id: int = 0,
+        jsonrpc_version: str = "2.0",
+    ):
+        if self.batch_window is None or method not in BATCH_METHODS:
+            return await super()._do_post(method, params, id, jsonrpc_version)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = {
+            "jsonrpc": jsonrpc_version,
+            "method": method,
+            "params": params if params else [],
+        }
+        self._batch.append((request, future))
+        if len(self._batch) >= MAX_BATCH_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.batch_window > 0:
+                self._flush_handle = loop.call_later(self.batch_window, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, []
+        if len(batch) > 0:
+            task = asyncio.get_running_loop().create_task(self._send_batch(batch))
+            # keep a reference until the task is done, the loop only holds it weakly
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                responses: Any = [await self._post({**batch[0][0], "id": 0})]
+            else:
+                self.batches_sent += 1
+                self.batched_requests += len(batch)
+                responses = await self._post(
+                    [{**request, "id": i} for i, (request, _) in enumerate(batch)]  # type: ignore[arg-type]
+                )
+            if isinstance(responses, dict):
+                # the server rejected the batch as a whole
+                responses = [{**responses, "id": i} for i in range(len(batch))]
+            # the responses of a batch may come in any order
+            by_id = {response.get("id"): response for response in responses}
+            for i, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                response = by_id.get(i)
+                if response is None:
+                    future.set_exception(
+                        noderpc.JsonRpcError(-32603, "no response in batch")
+                    )
+                elif "error" in response:
+                    future.set_exception(noderpc.JsonRpcError(**response["error"]))
+                else:
+                    future.set_result(response["result"])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def block_count(self) -> int:
+        """
+        Get the number of blocks in the chain. Follows new blocks through a websocket subscription, falls back to
+        asking the node every time if the subscription fails.
+        """
+        if self._block_watcher is None:
+            self._block_count = await self.get_block_count()
+            self._block_watcher = asyncio.get_running_loop().create_task(
+                self._watch_blocks()
+            )
+        if self._block_watcher.done():
+            return await self.get_block_count()
+        return self._block_count  # type: ignore[return-value]
+
+    def observe_block(self, index: int) -> None:
+        """
+        Record that block `index` is persisted, e.g. because a transaction receipt arrived before the block
+        notification.
+        """
+        if self._block_count is not None:
+            self._block_count = max(self._block_count, index + 1)
+
+    async def _watch_blocks(self) -> None:
+        url = self.url.replace("http", "ws", 1).rstrip("/") + "/ws"
+        try:
+            async with self.session.ws_connect(url) as ws:
+                await ws.send_json(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "subscribe",
+                        "params": ["block_added"],
+                    }
+                )
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    event = message.json()
+                    if event.get("method") == "block_added":
+                        count = event["params"][0]["index"] + 1
+                        self._block_count = max(self._block_count or 0, count)
+        except (aiohttp.ClientError, ValueError, KeyError) as e:
+            log.debug(f"not following blocks of {self.url}: {e}")
+
+    async def find_storage_page(
+        self, contract_hash: types.UInt160, prefix: bytes, start: int
+    ) -> tuple[list[tuple[bytes, bytes]], Optional[int]]:
+        """
+        Get the page of storage entries of a contract with keys starting with `prefix`, from the `start`-th entry on.
+        Entries are ordered by key, the page size is determined by the node.
+
+        Returns:
+            the entries and the index of the next page, or None if this is the last page.
+        """
+        response = await self._do_post(
+            "findstorage",
+            [f"0x{contract_hash}", base64.b64encode(prefix).decode(), start],
+        )
+        pairs = [
+            (base64.b64decode(pair["key"]), base64.b64decode(pair["value"]))
+            for pair in response["results"] or []
+        ]
+        return pairs, response["next"] if response["truncated"] else None
+
+    async def iter_storage(
+        self,
+        contract_hash: types.UInt160,
+        prefix: bytes = b"",
+        *,
+        start_key: Optional[bytes] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncGenerator[tuple[bytes, bytes], None]:
+        """
+        Iterate over the storage entries of a contract in key order, fetching the next page while the current one is
+        consumed.
+
+        Args:
+            contract_hash: the contract to read the storage of.
+            prefix: only return entries with keys starting with this prefix.
+            start_key: skip the entries with keys before this key. Earlier pages are not fetched.
+            limit: stop after this many entries.
+        """
+        async for pairs in self.iter_storage_pages(
+            contract_hash, prefix, start_key=start_key, limit=limit
+        ):
+            for pair in pairs:
+                yield pair
+
+    async def iter_storage_pages(
+        self,
+        contract_hash: types.UInt160,
+        prefix: bytes = b"",
+        *,
+        start_key: Optional[bytes] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncGenerator[list[tuple[bytes, bytes]], None]:
+        """
+        Like `iter_storage()`, but yield the entries page by page.
+        """
+        start = 0
+        if start_key is not None:
+            start = await self._storage_index(contract_hash, prefix, start_key)
+        remaining = limit
+        page: Optional[asyncio.Future] = asyncio.ensure_future(
+            self.find_storage_page(contract_hash, prefix, start)
+        )
+        try:
+            while page is not None and remaining != 0:
+                pairs, next_start = await page
+                page = None
+                if next_start is not None and (
+                    remaining is None or remaining > len(pairs)
+                ):
+                    page = asyncio.ensure_future(
+                        self.find_storage_page(contract_hash, prefix, next_start)
+                    )
+                if start_key is not None and len(pairs) > 0 and pairs[0][0] < start_key:
+                    pairs = [pair for pair in pairs if pair[0] >= start_key]
+                if remaining is not None:
+                    pairs = pairs[:remaining]
+                    remaining -= len(pairs)
+                if len(pairs) > 0:
+                    yield pairs
+        finally:
+            if page is not None:
+                page.cancel()
+
+    async def count_storage(
+        self, contract_hash: types.UInt160, prefix: bytes = b""
+    ) -> int:
+        """
+        Count the storage entries of a contract with keys starting with `prefix`. Probes pages at growing offsets and
+        bisects the end, which takes a logarithmic number of requests instead of fetching every page.
+        """
+        # the count is in [low, high]
+        low, high = 0, None
+        probe = 0
+        while True:
+            pairs, next_start = await self.find_storage_page(
+                contract_hash, prefix, probe
+            )
+            if next_start is None:
+                if len(pairs) > 0:
+                    return probe + len(pairs)
+                high = probe
+            else:
+                low = probe + len(pairs) + 1
+            if high is not None and low >= high:
+                return high
+            probe = 2 * low if high is None else (low + high) // 2
+
+    async def _storage_index(
+        self, contract_hash: types.UInt160, prefix: bytes, key: bytes
+    ) -> int:
+        """
+        Find the index of the first entry with a key not before `key` by bisecting pages of the ordered entries.
+        """
+        # the index is in [low, high]
+        low, high = 0, None
+        probe = 0
+        while True:
+            pairs, _ = await self.find_storage_page(contract_hash, prefix, probe)
+            if len(pairs) == 0 or pairs[0][0] >= key:
+                high = probe
+            elif pairs[-1][0] < key:
+                low = probe + len(pairs)
+            else:
+                return probe + next(i for i, (k, _) in enumerate(pairs) if k >= key)
+            if high is not None and low >= high:
+                return high
+            probe = 2 * low if high is None else (low + high) // 2
+
+    async def close(self):
+        pass
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+async def _close_on_shutdown(client: PooledRpcClient):
+    # event loops close all unfinished async generators when shutting down (`asyncio.run()` and
+    # `IsolatedAsyncioTestCase` both do), which gives the client a chance to close its session in its own loop
+    try:
+        yield
+    finally:
+        client._flush()
+        await asyncio.gather(*client._batch_tasks, return_exceptions=True)
+        if client._block_watcher is not None:
+            client._block_watcher.cancel()
+            await asyncio.gather(client._block_watcher, return_exceptions=True)
+        await client.session.close()
+
+
+class RpcClientPool:
+    """
+    Hands out one `PooledRpcClient` per event loop.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_RPC_TIMEOUT,
+        batch_window: Optional[float] = DEFAULT_BATCH_WINDOW,
+    ):
+        """
+        Args:
+            host: RPC server address.
+            pool_size: maximum number of concurrent connections per event loop.
+            timeout: maximum time in seconds a request may take.
+            batch_window: time in seconds to collect read-only requests for a batch. None disables batching.
+        """
+        self.host = host
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self._clients: dict[
+            asyncio.AbstractEventLoop, tuple[PooledRpcClient, object]
+        ] = {}
+
+    async def client(self) -> PooledRpcClient:
+        """
+        Get the client for the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is not None:
+            return entry[0]
+
+        # forget the clients of loops that are gone, their sessions were closed on shutdown
+        self._clients = {
+            other: entry
+            for other, entry in self._clients.items()
+            if not other.is_closed()
+        }
+        client = PooledRpcClient(
+            self.host, self.pool_size, self.timeout, self.batch_window
+        )
+        closer = _close_on_shutdown(client)
+        await closer.__anext__()
+        # keep a reference, the loop only holds the generator weakly
+        self._clients[loop] = (client, closer)
+        return client
+
+
+class PooledChainFacade(ChainFacade):
+    """
+    A `ChainFacade` that sends its requests over pooled connections instead of a new session per request.
+    """
+
+    def __init__(
+        self,
+        rpc_host: str,
+        receipt_retry_delay: Optional[float] = None,
+        receipt_timeout: Optional[float] = None,
+        rpc_timeout: float = DEFAULT_RPC_TIMEOUT,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        batch_window: Optional[float] = DEFAULT_BATCH_WINDOW,
+    ):
+        """
+        Args:
+            rpc_host: Neo RPC node host address.
+            receipt_retry_delay: time to wait in seconds between attempts to find the transaction on the chain.
+            receipt_timeout: maximum time to wait in seconds to find the transaction on the chain.
+            rpc_timeout: maximum time to wait in seconds for a response from the node to an RPC request.
+            pool_size: maximum number of concurrent connections per event loop.
+            batch_window: time in seconds to collect read-only requests for a batch. None disables batching.
+        """
+        super().__init__(rpc_host, receipt_retry_delay, receipt_timeout, rpc_timeout)
+        self.pool = RpcClientPool(rpc_host, pool_size, rpc_timeout, batch_window)
+        self._version: Optional[noderpc.GetVersionResponse] = None
+        # fee per byte and exec fee factor
+        self._fee_policy: Optional[tuple[int, int]] = None
+
+    async def get_version(self) -> noderpc.GetVersionResponse:
+        """
+        Get the version and protocol settings of the node. Cached, they are taken from the node configuration.
+        """
+        if self._version is None:
+            client = await self.pool.client()
+            self._version = await client.get_version()
+        return self._version
+
+    async def get_network(self) -> int:
+        """
+        Get the network magic of the chain. Cached, it never changes for a running node.
+        """
+        return (await self.get_version()).protocol.network
+
+    async def fee_policy(self) -> tuple[int, int]:
+        """
+        Get the fee per byte and exec fee factor of the chain.
+
+        Cached until a transaction calling one of the `FEE_POLICY_SETTERS` is sent or `clear_fee_policy()` is called.
+        """
+        if self._fee_policy is None:
+            client = await self.pool.client()
+            policy = PolicyContract()
+            res = await client.invoke_script(
+                policy.fee_per_byte().script + policy.exec_fee_factor().script
+            )
+            unwrap.check_state_ok(res)
+            self._fee_policy = (unwrap.as_int(res, 0), unwrap.as_int(res, 1))
+        return self._fee_policy
+
+    def clear_fee_policy(self) -> None:
+        """
+        Forget the cached fee policy, e.g. because the node restarted from a snapshot with a different chain state.
+        """
+        self._fee_policy = None
+
+    def _check_fee_policy_change(self, script: bytes) -> None:
+        policy_hash = PolicyContract().hash.to_array()
+        if policy_hash in script and any(
+            setter in script for setter in FEE_POLICY_SETTERS
+        ):
+            self.clear_fee_policy()
+
+    async def _test_invoke(
+        self,
+        f: ContractMethodResult[ReturnType],
+        *,
+        signers: Optional[Sequence[SigningPair]] = None,
+        return_raw: Optional[bool] = False,
+    ) -> InvokeReceipt[ReturnType]:
+        _signers = []
+        if signers is not None:
+            _signers = list(map(lambda p: p[1], signers))
+
+        client = await self.pool.client()
+        res = await client.invoke_script(f.script, _signers)
+        result: Any
+        if f.execution_processor is None or return_raw or res.state != "HALT":
+            result = res
+        else:
+            result = f.execution_processor(res, 0)
+        return InvokeReceipt[ReturnType](
+            types.UInt256.zero(),
+            -1,
+            -1,
+            res.gas_consumed,
+            # like `ChainFacade`, the state is the name the node reports instead of a `VMState`
+            res.state,  # type: ignore[arg-type]
+            res.exception,
+            res.notifications,
+            result,
+        )
+
+    async def invoke(
+        self,
+        f: ContractMethodResult[ReturnType],
+        *,
+        signers: Optional[Sequence[SigningPair]] = None,
+        network_fee: int = 0,
+        system_fee: int = 0,
+        append_network_fee: int = 0,
+        append_system_fee: int = 0,
+        valid_until_block: int = 0,
+    ) -> InvokeReceipt[ReturnType]:
+        delay, timeout = await self._get_receipt_time_values()
+        tx_id = await self.invoke_fast(
+            f,
+            signers=signers,
+            network_fee=network_fee,
+            system_fee=system_fee,
+            append_network_fee=append_network_fee,
+            append_system_fee=append_system_fee,
+            valid_until_block=valid_until_block,
+        )
+        client = await self.pool.client()
+        receipt = await client.wait_for_transaction_receipt(
+            tx_id, timeout=timeout, retry_delay=delay
+        )
+        client.observe_block(receipt.included_in_block)
+        # transactions built while this one was pending may have read the old policy
+        self._check_fee_policy_change(f.script)
+        result: Any
+        if f.execution_processor is not None and receipt.execution.state == "HALT":
+            result = f.execution_processor(receipt.execution, 0)
+        else:
+            result = receipt.execution
+        return InvokeReceipt[ReturnType](
+            receipt.tx_hash,
+            receipt.included_in_block,
+            receipt.confirmations,
+            receipt.execution.gas_consumed,
+            receipt.execution.state,  # type: ignore[arg-type]
+            receipt.execution.exception,
+            receipt.execution.notifications,
+            result,
+        )
+
+    async def invoke_fast(
+        self,
+        f: ContractMethodResult[ReturnType],
+        *,
+        signers: Optional[Sequence[SigningPair]] = None,
+        network_fee: int = 0,
+        system_fee: int = 0,
+        append_network_fee: int = 0,
+        append_system_fee: int = 0,
+        valid_until_block: int = 0,
+    ) -> types.UInt256:
+        if network_fee > 0 and append_network_fee > 0:
+            raise ValueError(
+                "network_fee and append_network_fee are mutually exclusive"
+            )
+        if system_fee > 0 and append_system_fee > 0:
+            raise ValueError("system_fee and append_system_fee are mutually exclusive")
+
+        client = await self.pool.client()
+        builder = txbuilder.TxBuilder(client, f.script)
+        # the network and chain height are known, which saves the requests `init()` and `set_valid_until_block()` make
+        builder.network = await self.get_network()
+        # the builder uses a fixed nonce, which gives the same hash to repeated transactions with the same script and
+        # sender that are valid until the same block
+        builder.tx.nonce = random.randint(0, 2**32 - 1)
+
+        if signers is None:
+            signers = self._signing_pairs
+        for func, signer in signers:
+            builder.add_signer(func, signer)
+
+        if valid_until_block <= 0:
+            valid_until_block = VALID_UNTIL_BLOCKS
+        # like `set_valid_until_block()`, relative to the current height
+        builder.tx.valid_until_block = await client.block_count() + valid_until_block
+
+        if system_fee > 0:
+            builder.tx.system_fee = system_fee
+        else:
+            await builder.calculate_system_fee(self._emit_log_marker)
+            builder.tx.system_fee += append_system_fee
+
+        if network_fee > 0:
+            builder.tx.network_fee = network_fee
+        else:
+            # the witnesses are needed to calculate the network fee, but the network fee is part of the signed data.
+            # Sign once to create the witnesses, calculate the fee and sign again below.
+            reset_witnesses = len(builder.tx.witnesses) == 0
+            builder.tx.network_fee = 999
+            await builder.build_and_sign()
+            fee = calculate_network_fee(builder.tx, *await self.fee_policy())
+            if fee is None:
+                await builder.calculate_network_fee()
+            else:
+                builder.tx.network_fee = fee
+            if reset_witnesses:
+                builder.tx.witnesses = []
+            builder.tx.network_fee += append_network_fee
+
+        tx = await builder.build_and_sign()
+        tx_id = await client.send_transaction(tx)
+        self._check_fee_policy_change(f.script)
+        return tx_id
+
+    async def estimate_gas(
+        self,
+        f: ContractMethodResult,
+        *,
+        signers: Optional[Sequence[verification.Signer]] = None,
+    ) -> int:
+        client = await self.pool.client()
+        res = await client.invoke_script(f.script, signers)
+        return res.gas_consumed
+
+    async def _get_receipt_time_values(self) -> tuple[float, float]:
+        if self._receipt_retry_delay is not None and self._receipt_timeout is not None:
+            return self._receipt_retry_delay, self._receipt_timeout
+        result = await self.get_version()
+        # the same values as `ChainFacade` uses
+        delay = (result.protocol.ms_per_block / 1000) / 5
+        if self._receipt_retry_delay is not None:
+            delay = self._receipt_retry_delay
+        timeout = ((result.protocol.ms_per_block / 1000) * 2) + delay
+        if self._receipt_timeout is not None:
+            timeout = self._receipt_timeout
+        return delay, timeout
@@ -0,0 +1,398 @@
+"""
+Parallel test runner.
+
+Discovers tests like `python -m unittest discover` and distributes the test classes over worker processes. Like in a
+serial run every class starts its own node, so tests see the same chain state as with `python -m unittest`. Shards are
+balanced using the class durations recorded in previous runs and the results are merged into a single unittest report.
+
+With `--shared-node` the classes of a worker run against one shared `NeoGoNode` instead, so K workers run K nodes side
+by side. This saves a node startup per class, but a class then sees the chain state left by the classes that ran before
+it in the same worker, which depends on how the classes are sharded. Only use it for classes that don't depend on a
+fresh chain, see `SmartContractTestCase.shared_node`.
+
+Usage:
+    python -m boaconstructor.runner -s tests/ -j 4
+"""
+
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+import time
+import unittest
+from dataclasses import dataclass
+from typing import Iterator, Optional, TextIO, cast
+
+DEFAULT_DURATIONS_FILE = ".boaconstructor-durations.json"
+
+
+@dataclass
+class TestOutcome:
+    test_id: str
+    description: str
+    #: one of success, failure, error, skip, expected_failure, unexpected_success
+    status: str
+    #: formatted traceback or skip reason
+    details: str = ""
+
+
+@dataclass
+class ShardResult:
+    outcomes: list[TestOutcome]
+    #: seconds it took to run each test class, keyed by class name
+    durations: dict[str, float]
+    tests_run: int
+
+
+class _RecordingResult(unittest.TestResult):
+    """
+    Records outcomes in a form that can be send back to the main process, together with the duration of every test
+    class.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.outcomes: list[TestOutcome] = []
+        self.durations: dict[str, float] = {}
+        self._current_class: Optional[str] = None
+        # a class is timed from the end of the previous class such that class fixtures are included
+        self._class_start = self._last_stop = time.perf_counter()
+
+    def startTest(self, test):
+        super().startTest(test)
+        name = _class_name(test)
+        if name != self._current_class:
+            if self._current_class is not None:
+                self.durations[self._current_class] = (
+                    self._last_stop - self._class_start
+                )
+                self._class_start = self._last_stop
+            self._current_class = name
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self._last_stop = time.perf_counter()
+
+    def stopTestRun(self):
+        super().stopTestRun()
+        if self._current_class is not None:
+            self.durations[self._current_class] = (
+                time.perf_counter() - self._class_start
+            )
+
+    def _record(self, test, status: str, details: str = "") -> None:
+        self.outcomes.append(TestOutcome(test.id(), str(test), status, details))
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, "success")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "failure", self.failures[-1][1])
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, "error", self.errors[-1][1])
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skip", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "expected_failure", self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "unexpected_success")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            if issubclass(err[0], test.failureException):
+                self._record(subtest, "failure", self.failures[-1][1])
+            else:
+                self._record(subtest, "error", self.errors[-1][1])
+
+
+class _RemoteTest:
+    """
+    Stand-in for a test that ran in a worker process.
+    """
+
+    def __init__(self, outcome: TestOutcome):
+        self._outcome = outcome
+
+    def id(self) -> str:
+        return self._outcome.test_id
+
+    def shortDescription(self) -> Optional[str]:
+        return None
+
+    def __str__(self) -> str:
+        return self._outcome.description
+
+
+class _MergedResult(unittest.TextTestResult):
+    """
+    A text result that accepts the already formatted tracebacks of worker processes.
+    """
+
+    def _exc_info_to_string(self, err, test):
+        if isinstance(err, str):
+            return err
+        # a private method of `unittest.TestResult` that typeshed does not declare
+        return super()._exc_info_to_string(err, test)  # type: ignore[misc]
+
+    def add_outcome(self, outcome: TestOutcome) -> None:
+        test = _RemoteTest(outcome)
+        self.startTest(test)  # type: ignore
+        match outcome.status:
+            case "success":
+                self.addSuccess(test)  # type: ignore
+            case "failure":
+                self.addFailure(test, outcome.details)  # type: ignore
+            case "error":
+                self.addError(test, outcome.details)  # type: ignore
+            case "skip":
+                self.addSkip(test, outcome.details)  # type: ignore
+            case "expected_failure":
+                self.addExpectedFailure(test, outcome.details)  # type: ignore
+            case "unexpected_success":
+                self.addUnexpectedSuccess(test)  # type: ignore
+        self.stopTest(test)  # type: ignore
+
+
+def _class_name(test) -> str:
+    cls = type(test)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _iter_tests(suite: unittest.TestSuite) -> Iterator[unittest.TestCase]:
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from _iter_tests(test)
+        else:
+            yield test
+
+
+def group_by_class(suite: unittest.TestSuite) -> dict[str, list[str]]:
+    """
+    Group the ids of all tests in `suite` by the name of their test class.
+    """
+    groups: dict[str, list[str]] = {}
+    for test in _iter_tests(suite):
+        groups.setdefault(_class_name(test), []).append(test.id())
+    return groups
+
+
+def make_shards(
+    class_names: list[str], durations: dict[str, float], count: int
+) -> list[list[str]]:
+    """
+    Distribute the test classes over `count` shards with roughly equal total duration.
+
+    Classes without a recorded duration are assumed to take as long as the average recorded class.
+
+    Args:
+        class_names: names of the test classes to distribute.
+        durations: seconds each test class took in a previous run.
+        count: number of shards.
+    """
+    known = [durations[name] for name in class_names if name in durations]
+    default = sum(known) / len(known) if known else 1.0
+    costs = {name: durations.get(name, default) for name in class_names}
+
+    shards: list[list[str]] = [[] for _ in range(max(1, count))]
+    totals = [0.0] * len(shards)
+    # longest processing time first; always add to the least loaded shard
+    for name in sorted(class_names, key=lambda n: costs[n], reverse=True):
+        idx = totals.index(min(totals))
+        shards[idx].append(name)
+        totals[idx] += costs[name]
+    return [shard for shard in shards if shard]
+
+
+def _run_shard(
+    top_level_dir: str, test_ids: list[str], shared_node: bool
+) -> ShardResult:
+    """
+    Worker process entry point.
+    """
+    if top_level_dir not in sys.path:
+        sys.path.insert(0, top_level_dir)
+
+    from boaconstructor import SmartContractTestCase
+
+    if shared_node:
+        SmartContractTestCase.shared_node = True
+    # a daemon serves one run at a time, every worker needs its own node
+    SmartContractTestCase.use_daemon = False
+
+    suite = unittest.TestLoader().loadTestsFromNames(test_ids)
+    result = _RecordingResult()
+    result.startTestRun()
+    suite.run(result)
+    result.stopTestRun()
+    return ShardResult(result.outcomes, result.durations, result.testsRun)
+
+
+def _load_durations(path: pathlib.Path) -> dict[str, float]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def run(
+    start_dir: str,
+    pattern: str = "test*.py",
+    top_level_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    durations_path: str = DEFAULT_DURATIONS_FILE,
+    shared_node: bool = False,
+    verbosity: int = 1,
+    stream: TextIO = sys.stderr,
+) -> unittest.TestResult:
+    """
+    Discover and run tests in parallel.
+
+    Args:
+        start_dir: directory to start discovery.
+        pattern: pattern to match test files.
+        top_level_dir: top level directory of the project. Defaults to `start_dir`.
+        workers: number of worker processes (and nodes). Defaults to the number of CPUs.
+        durations_path: file to read and update the recorded test class durations.
+        shared_node: let all classes of a worker use one node. By default every class starts its own node, like in a
+         serial run.
+        verbosity: unittest verbosity level.
+        stream: where to write the report.
+    """
+    loader = unittest.TestLoader()
+    suite = loader.discover(start_dir, pattern, top_level_dir)
+    # discover() adds the top level directory to sys.path, the workers need the same
+    top_level_dir = start_dir if top_level_dir is None else top_level_dir
+    top_level_dir = str(pathlib.Path(top_level_dir).absolute())
+
+    # modules that failed to import are reported by unittest as tests of its own loader module. These can't be loaded
+    # by name in a worker, so they are run here
+    local_suite = unittest.TestSuite()
+    remote_suite = unittest.TestSuite()
+    for test in _iter_tests(suite):
+        if type(test).__module__ == "unittest.loader":
+            local_suite.addTest(test)
+        else:
+            remote_suite.addTest(test)
+
+    groups = group_by_class(remote_suite)
+    durations_file = pathlib.Path(durations_path)
+    durations = _load_durations(durations_file)
+    shards = make_shards(list(groups), durations, workers or os.cpu_count() or 1)
+
+    runner = unittest.TextTestRunner(
+        stream,
+        verbosity=verbosity,
+        # typeshed makes `TextTestResult` generic in its stream type, which a subclass can't declare at runtime
+        resultclass=_MergedResult,  # type: ignore[arg-type]
+    )
+    result = cast(_MergedResult, runner._makeResult())
+    start = time.perf_counter()
+    local_suite.run(result)
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max(1, len(shards)), mp_context=ctx
+    ) as pool:
+        futures = [
+            pool.submit(
+                _run_shard,
+                top_level_dir,
+                [test_id for name in shard for test_id in groups[name]],
+                shared_node,
+            )
+            for shard in shards
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            shard_result = future.result()
+            for outcome in shard_result.outcomes:
+                result.add_outcome(outcome)
+            # class level errors (e.g. in setUpClass) are not counted as a test run
+            result.testsRun += shard_result.tests_run - len(shard_result.outcomes)
+            durations.update(shard_result.durations)
+    elapsed = time.perf_counter() - start
+
+    with open(durations_file, "w") as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+
+    _print_summary(result, elapsed, stream)
+    return result
+
+
+def _print_summary(result: _MergedResult, elapsed: float, stream: TextIO) -> None:
+    # mirrors the output of unittest.TextTestRunner
+    if result.dots or result.showAll:
+        stream.write("\n")
+    result.printErrors()
+    stream.write(result.separator2 + "\n")
+    stream.write(
+        f"Ran {result.testsRun} test{'s' if result.testsRun != 1 else ''} in {elapsed:.3f}s\n\n"
+    )
+    infos = []
+    if result.failures:
+        infos.append(f"failures={len(result.failures)}")
+    if result.errors:
+        infos.append(f"errors={len(result.errors)}")
+    if result.skipped:
+        infos.append(f"skipped={len(result.skipped)}")
+    if result.expectedFailures:
+        infos.append(f"expected failures={len(result.expectedFailures)}")
+    if result.unexpectedSuccesses:
+        infos.append(f"unexpected successes={len(result.unexpectedSuccesses)}")
+    status = "OK" if result.wasSuccessful() else "FAILED"
+    stream.write(f"{status} ({', '.join(infos)})\n" if infos else f"{status}\n")
+    stream.flush()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="boaconstructor-test",
+        description="Run smart contract tests in parallel against a pool of neo-go nodes.",
+    )
+    parser.add_argument("-s", "--start-directory", default=".")
+    parser.add_argument("-p", "--pattern", default="test*.py")
+    parser.add_argument("-t", "--top-level-directory", default=None)
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes. Defaults to the number of CPUs",
+    )
+    parser.add_argument("--durations", default=DEFAULT_DURATIONS_FILE)
+    parser.add_argument(
+        "--shared-node",
+        action="store_true",
+        help="share one node between the test classes of a worker instead of starting a node per class. Faster, but "
+        "unlike in a serial run a class sees the chain state left by the classes that ran before it in its worker",
+    )
+    parser.add_argument("-v", "--verbose", action="store_const", const=2, default=1)
+    args = parser.parse_args(argv)
+
+    result = run(
+        args.start_directory,
+        args.pattern,
+        args.top_level_directory,
+        args.workers,
+        args.durations,
+        shared_node=args.shared_node,
+        verbosity=args.verbose,
+    )
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+from boaconstructor import AsyncNeoGoNode
+from neo3 import vm
+from neo3.api.wrappers import ContractMethodResult
+from neo3.api.helpers.signing import sign_with_multisig_account
+from neo3.network.payloads.verification import Signer
+
+
+class AsyncNodeTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.node = AsyncNeoGoNode()
+        await self.node.start()
+
+    async def asyncTearDown(self) -> None:
+        await self.node.stop()
+
+    async def test_receive_logs(self):
+        queue = self.node.subscribe()
+        sb = vm.ScriptBuilder().emit_push("hello").emit_syscall(vm.Syscalls.SYSTEM_RUNTIME_LOG)
+        await self.node.facade.test_invoke(ContractMethodResult(sb.to_array()))
+        runtime_log = await asyncio.wait_for(queue.get(), 10)
+        self.assertEqual("hello", runtime_log.msg)
+        self.assertEqual([runtime_log], self.node.runtime_logs)
+
+    async def test_wait_for_runtime_logs(self):
+        def log_script(*messages):
+            sb = vm.ScriptBuilder()
+            for msg in messages:
+                sb.emit_push(msg).emit_syscall(vm.Syscalls.SYSTEM_RUNTIME_LOG)
+            return ContractMethodResult(sb.to_array())
+
+        await self.node.facade.test_invoke(log_script("other"))
+        committee = self.node.account_committee
+        txid = await self.node.facade.invoke_fast(
+            log_script("first", "second"),
+            signers=[(sign_with_multisig_account(committee), Signer(committee.script_hash))],
+        )
+        runtime_logs = await self.node.wait_for_runtime_logs(txid, count=2)
+        self.assertEqual(["first", "second"], [runtime_log.msg for runtime_log in runtime_logs])
+        self.assertTrue(all(runtime_log.txid == txid for runtime_log in runtime_logs))
+        # the logs of the test invocation are read, but not returned
+        self.assertIn("other", [runtime_log.msg for runtime_log in self.node.runtime_logs])
+
+        with self.assertRaises(TimeoutError):
+            await self.node.wait_for_runtime_logs(txid, count=3, timeout=0.5)
+
+    async def test_stop(self):
+        await self.node.stop()
+        self.assertFalse(self.node.running)
+
+    async def test_context_manager(self):
+        async with AsyncNeoGoNode() as node:
+            self.assertTrue(node.running)
+            self.assertGreater(await (await node.rpc_client()).block_count(), 0)
+        self.assertFalse(node.running)
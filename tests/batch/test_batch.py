@@ -0,0 +1,32 @@
+from boaconstructor import SmartContractTestCase
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class BatchTest(SmartContractTestCase):
+    async def test_batch(self):
+        owner = self.node.account_committee.script_hash
+        users = [self.node.wallet.account_new(f"user{i}").script_hash for i in range(10)]
+        async with self.batch() as batch:
+            for user in users:
+                await batch.transfer(GAS, owner, user, 10, 8)
+            # the same transaction twice must not be rejected as a duplicate
+            await batch.transfer(GAS, owner, users[0], 10, 8)
+        self.assertEqual(11, len(batch.results))
+        self.assertTrue(all(success for success, _ in batch.results))
+
+        balances = await self.gather_calls([(GAS, "balanceOf", [user], int) for user in users])
+        self.assertEqual([20_00000000] + [10_00000000] * 9, balances)
+
+    async def test_submit_many(self):
+        owner = self.node.account_committee
+        user = self.node.wallet.account_new("alice").script_hash
+        results = await self.submit_many(
+            [
+                (GAS, "transfer", [owner.script_hash, user, 1, None], bool, [owner]),
+                (GAS, "transfer", [user, owner.script_hash, 1, None], bool, [owner]),
+            ]
+        )
+        # the second transfer is not signed by the sender
+        self.assertEqual([True, False], [success for success, _ in results])
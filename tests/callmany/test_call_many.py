@@ -0,0 +1,49 @@
+from boaconstructor import SmartContractTestCase
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+NEO = CONTRACT_HASHES.NEO_TOKEN
+
+
+class CallManyTest(SmartContractTestCase):
+    async def test_call_many(self):
+        owner = self.node.account_committee.script_hash
+        symbol, decimals, balance = await self.call_many(
+            [
+                (GAS, "symbol", None, str),
+                (NEO, "decimals", None, int),
+                (NEO, "balanceOf", [owner], int),
+            ]
+        )
+        self.assertEqual("GAS", symbol)
+        self.assertEqual(0, decimals)
+        self.assertGreater(balance, 0)
+
+    async def test_failure_per_entry(self):
+        calls = [
+            (GAS, "symbol", None, str),
+            (GAS, "balanceOf", [b"\x01"], int),
+            (NEO, "symbol", None, str),
+        ]
+        results = await self.call_many(calls, return_exceptions=True)
+        self.assertEqual("GAS", results[0])
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual("NEO", results[2])
+
+        with self.assertRaises(ValueError):
+            await self.call_many(calls)
+
+    async def test_gather_calls(self):
+        accounts = [self.node.wallet.account_new(f"user{i}").script_hash for i in range(20)]
+        accounts.append(self.node.account_committee.script_hash)
+        balances = await self.gather_calls(
+            [(NEO, "balanceOf", [acc], int) for acc in accounts], max_concurrency=5
+        )
+        self.assertEqual([0] * 20, balances[:20])
+        self.assertGreater(balances[20], 0)
+
+        results = await self.gather_calls(
+            [(GAS, "balanceOf", [b"\x01"], int), (GAS, "symbol", None, str)], return_exceptions=True
+        )
+        self.assertIsInstance(results[0], ValueError)
+        self.assertEqual("GAS", results[1])
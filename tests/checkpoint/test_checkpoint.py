@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+from boaconstructor import NeoGoNode, SmartContractTestCase
+from neo3.wallet import account
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class CheckpointTest(SmartContractTestCase):
+    enable_checkpoints = True
+    genesis: account.Account
+    user: account.Account
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = cls.node.wallet.account_new("alice")
+        asyncio.run(cls.asyncSetupClass())
+        cls.checkpoint()
+
+    @classmethod
+    async def asyncSetupClass(cls) -> None:
+        cls.genesis = cls.node.wallet.account_get_by_label("committee")
+        await cls.transfer(GAS, cls.genesis.script_hash, cls.user.script_hash, 100, 8)
+
+    async def _spend(self):
+        """both tests start from the checkpoint regardless of the order they run in"""
+        balance, _ = await self.call("balanceOf", [self.user.script_hash], return_type=int, target_contract=GAS)
+        self.assertEqual(100_00000000, balance)
+        await self.transfer(GAS, self.user.script_hash, self.genesis.script_hash, 10, 8, signing_account=self.user)
+        balance, _ = await self.call("balanceOf", [self.user.script_hash], return_type=int, target_contract=GAS)
+        self.assertLess(balance, 90_00000000)
+
+    async def test_spend1(self):
+        await self._spend()
+
+    async def test_spend2(self):
+        await self._spend()
+
+
+class StopTest(unittest.TestCase):
+    def test_stop_cleans_up(self):
+        node = NeoGoNode(persistent=True)
+        node.start()
+        node.checkpoint()
+        process = node._process
+        node.stop()
+        self.assertTrue(process.stdout.closed)
+        self.assertFalse(node.work_dir.exists())
+
+        # a stopped node starts over in a new work directory
+        node.start()
+        self.addCleanup(node.stop)
+        self.assertTrue(node.work_dir.exists())
+        self.assertFalse(node.has_checkpoint)
@@ -0,0 +1,77 @@
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import yaml
+from boaconstructor import config
+from boaconstructor.node import NeoGoNode
+
+
+class NodeConfigTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # keep the cache of the developer out of the tests
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = pathlib.Path(tmp.name)
+        patcher = mock.patch.object(config, "CACHE_DIR", self.tmp.joinpath("cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.base = {
+            "ProtocolConfiguration": {"TimePerBlock": "100ms", "Hardforks": {"Aspidochelone": 0}},
+            "ApplicationConfiguration": {"RPC": {"Addresses": ["127.0.0.1:0"], "MaxGasInvoke": 15}},
+        }
+
+    def test_apply_overrides(self):
+        cfg = config.NodeConfig(time_per_block=50, max_gas_invoke=100, rpc_port=20332, hardforks={"Cockatrice": 5})
+        result = cfg.apply(self.base)
+        self.assertEqual("50ms", result["ProtocolConfiguration"]["TimePerBlock"])
+        self.assertEqual({"Aspidochelone": 0, "Cockatrice": 5}, result["ProtocolConfiguration"]["Hardforks"])
+        self.assertEqual(100, result["ApplicationConfiguration"]["RPC"]["MaxGasInvoke"])
+        self.assertEqual(["127.0.0.1:20332"], result["ApplicationConfiguration"]["RPC"]["Addresses"])
+        # the base configuration is shared and must not change
+        self.assertEqual("100ms", self.base["ProtocolConfiguration"]["TimePerBlock"])
+
+    def test_invalid_db_type(self):
+        with self.assertRaises(ValueError):
+            config.NodeConfig(db_type="rocksdb").apply(self.base)
+
+    def test_log_level(self):
+        result = config.NodeConfig(log_level="warn").apply(self.base)
+        self.assertEqual("warn", result["ApplicationConfiguration"]["LogLevel"])
+        with self.assertRaises(ValueError):
+            config.NodeConfig(log_level="verbose").apply(self.base)
+
+    def test_render_config(self):
+        path = config.render_config(self.base, self.tmp.joinpath("protocol.yml"))
+        with open(path) as f:
+            self.assertEqual(self.base, yaml.safe_load(f))
+
+    def test_render_into_work_dir(self):
+        node = NeoGoNode()
+        self.addCleanup(node.stop)
+        node._write_config()
+        self.assertEqual(node.work_dir, node.rendered_config_path.parent)
+        # a rendered configuration holds ports and paths of one node, it must not pile up in the cache
+        self.assertEqual([], list(config.cache_dir().glob("protocol-*")))
+
+    @unittest.skipIf(sys.platform == "win32", "POSIX permissions")
+    def test_cache_dir_is_private(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = pathlib.Path(tmp).joinpath("cache")
+            with mock.patch.object(config, "CACHE_DIR", cache):
+                path = config.cache_dir("fixtures")
+                self.assertEqual(cache.joinpath("fixtures"), path)
+                self.assertEqual(0o700, cache.stat().st_mode & 0o777)
+                self.assertEqual(0o700, path.stat().st_mode & 0o777)
+
+                # a directory others can write to may hold planted files
+                os.chmod(cache, 0o777)
+                with self.assertRaises(PermissionError):
+                    config.cache_dir()
+                os.chmod(cache, 0o700)
+                os.rmdir(path)
+                os.symlink(tmp, path)
+                with self.assertRaises(PermissionError):
+                    config.cache_dir("fixtures")
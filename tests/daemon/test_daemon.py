@@ -0,0 +1,114 @@
+import asyncio
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from boaconstructor import SmartContractTestCase, USE_DAEMON_ENV, config, daemon
+from boaconstructor.config import NodeConfig
+from neo3.api.helpers.signing import sign_with_multisig_account
+from neo3.api.wrappers import NEP17Contract
+from neo3.contracts.contract import CONTRACT_HASHES
+from neo3.network.payloads.verification import Signer
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class DaemonTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        patch = mock.patch.object(config, "CACHE_DIR", pathlib.Path(tmp.name))
+        patch.start()
+        cls.addClassCleanup(patch.stop)
+        cls.state_file = pathlib.Path(tmp.name).joinpath("daemon.json")
+        cls.thread = threading.Thread(target=daemon.serve, kwargs={"state_file": cls.state_file})
+        cls.thread.start()
+        cls.addClassCleanup(cls.thread.join)
+        deadline = time.monotonic() + 30
+        while (client := daemon.DaemonClient.from_state_file(cls.state_file)) is None:
+            if time.monotonic() > deadline or not cls.thread.is_alive():
+                raise RuntimeError("daemon did not start")
+            time.sleep(0.05)
+        cls.client = client
+        cls.addClassCleanup(client.request, "shutdown")
+
+    def test_state_file_is_private(self):
+        self.assertEqual(0o600, self.state_file.stat().st_mode & 0o777)
+
+    def test_requires_token(self):
+        client = daemon.DaemonClient(*self.client.address, token="0" * 64)
+        with self.assertRaises(daemon.DaemonError):
+            client.request("ping")
+        self.assertEqual("pong", self.client.request("ping"))
+
+    def test_snapshot_names_are_confined(self):
+        for name in ("../../escape.bolt", "/tmp/escape.bolt", None):
+            with self.assertRaises(daemon.DaemonError):
+                self.client.request("save_snapshot", name=name)
+
+    def test_remote_node_attributes(self):
+        node = daemon.RemoteNode(self.client)
+        self.addCleanup(node.stop)
+        self.assertEqual(NodeConfig(), node.config)
+        self.assertTrue(node.work_dir.is_dir())
+        self.assertTrue(node.captures_runtime_logs)
+        self.assertEqual({}, node._runtime_logs_by_tx)
+        self.assertEqual(self.client.request("info")["rpc_host"], node.facade.rpc_host)
+        self.assertIsNotNone(node.rpc_pool_size)
+        node.stop()
+        self.assertFalse(node.work_dir.exists())
+        self.assertEqual("pong", self.client.request("ping"))
+
+    def test_session_starts_at_genesis(self):
+        node = daemon.RemoteNode(self.client)
+        user = node.wallet.account_new().script_hash
+        signer = (
+            sign_with_multisig_account(node.account_committee),
+            Signer(node.account_committee.script_hash),
+        )
+        gas = NEP17Contract(GAS)
+
+        async def transfer_and_check():
+            await node.facade.invoke(gas.transfer(node.account_committee.script_hash, user, 1), signers=[signer])
+            return (await node.facade.test_invoke(gas.balance_of(user))).result
+
+        self.assertEqual(1, asyncio.run(transfer_and_check()))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot = pathlib.Path(tmp).joinpath("snapshot.bolt")
+            node.save_snapshot(snapshot)
+            self.assertTrue(snapshot.is_file())
+
+            node.new_session()
+            self.assertEqual(0, asyncio.run(node.facade.test_invoke(gas.balance_of(user))).result)
+
+            node.load_snapshot(snapshot)
+            self.assertEqual(1, asyncio.run(node.facade.test_invoke(gas.balance_of(user))).result)
+        self.assertEqual([], list(daemon.snapshot_dir().iterdir()))
+
+
+class UseDaemonTest(unittest.TestCase):
+    # the parallel runner changes these defaults for all test cases
+    @mock.patch.object(SmartContractTestCase, "shared_node", False)
+    @mock.patch.object(SmartContractTestCase, "use_daemon", None)
+    def test_opt_in(self):
+        class Default(SmartContractTestCase):
+            pass
+
+        class Explicit(SmartContractTestCase):
+            use_daemon = True
+
+        class Unsupported(SmartContractTestCase):
+            use_daemon = True
+            node_config = NodeConfig(max_gas_invoke=100)
+
+        with mock.patch.dict(os.environ, {USE_DAEMON_ENV: ""}):
+            self.assertFalse(Default._wants_daemon())
+            self.assertTrue(Explicit._wants_daemon())
+            self.assertFalse(Unsupported._wants_daemon())
+        with mock.patch.dict(os.environ, {USE_DAEMON_ENV: "1"}):
+            self.assertTrue(Default._wants_daemon())
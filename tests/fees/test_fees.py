@@ -0,0 +1,42 @@
+from unittest import mock
+from boaconstructor import SmartContractTestCase
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class FeesTest(SmartContractTestCase):
+    learn_fees = True
+
+    async def _transfer(self, **kwargs):
+        owner = self.node.account_committee
+        user = self.node.wallet.account_new().script_hash
+        return await self.call(
+            "transfer",
+            [owner.script_hash, user, 1, None],
+            return_type=bool,
+            signing_accounts=[owner],
+            target_contract=GAS,
+            **kwargs,
+        )
+
+    async def test_explicit_fee(self):
+        with self.assertRaises(ValueError):
+            await self._transfer(system_fee=1)
+
+    async def test_learned_fee(self):
+        client = await self.rpc_client()
+        with mock.patch.object(client, "invoke_script", wraps=client.invoke_script) as invoke_script:
+            success, _ = await self._transfer()
+            self.assertTrue(success)
+            # the first call simulates the transaction to learn the fee
+            self.assertGreater(invoke_script.call_count, 0)
+            self.assertEqual(1, len(self._learned_fees))
+            learned = list(self._learned_fees.values())[0]
+            self.assertGreater(learned, 0)
+
+            invoke_script.reset_mock()
+            success, _ = await self._transfer()
+            self.assertTrue(success)
+            self.assertEqual(0, invoke_script.call_count)
+            self.assertEqual(learned, list(self._learned_fees.values())[0])
@@ -0,0 +1,49 @@
+import asyncio
+import pathlib
+import tempfile
+from unittest import mock
+from boaconstructor import SmartContractTestCase, cached_setup, config
+from neo3.wallet import account
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class CachedSetupTest(SmartContractTestCase):
+    genesis: account.Account
+    user: account.Account
+    setup_runs = 0
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # start with an empty cache such that the first setup is always stored
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        patch = mock.patch.object(config, "CACHE_DIR", pathlib.Path(tmp.name))
+        patch.start()
+        cls.addClassCleanup(patch.stop)
+        super().setUpClass()
+        asyncio.run(cls.asyncSetupClass())
+
+    @classmethod
+    @cached_setup
+    async def asyncSetupClass(cls) -> None:
+        cls.setup_runs += 1
+        cls.genesis = cls.node.wallet.account_get_by_label("committee")
+        cls.user = cls.node.wallet.account_new("alice")
+        await cls.transfer(GAS, cls.genesis.script_hash, cls.user.script_hash, 100, 8)
+        cls.contract_hash = await cls.deploy("../runtimelog/resources/runtimelog_contract.nef", cls.genesis)
+
+    async def test_store_and_restore(self):
+        self.assertEqual(1, self.setup_runs)
+        self.assertEqual(1, len(list(config.cache_dir("fixtures").glob("*.json"))))
+        user = self.user
+        contract_hash = self.contract_hash
+        # the setup was stored in setUpClass, so this restores it from the cache
+        await self.asyncSetupClass()
+        self.assertEqual(1, self.setup_runs)
+        self.assertEqual(user.address, self.user.address)
+        self.assertIs(self.user, self.node.wallet.account_get_by_label("alice"))
+        self.assertEqual(contract_hash, self.contract_hash)
+        balance, _ = await self.call("balanceOf", [self.user.script_hash], return_type=int, target_contract=GAS)
+        self.assertEqual(100_00000000, balance)
@@ -0,0 +1,78 @@
+import asyncio
+import pathlib
+import tempfile
+from boaconstructor import SmartContractTestCase
+from boaconstructor.config import NodeConfig
+from boaconstructor.node import NeoGoNode
+from neo3.api.wrappers import GasToken
+from neo3.wallet import account
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class ForkTest(SmartContractTestCase):
+    enable_checkpoints = True
+    use_daemon = False
+    genesis: account.Account
+    user: account.Account
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = cls.node.wallet.account_new("alice")
+        asyncio.run(cls.asyncSetupClass())
+
+    @classmethod
+    async def asyncSetupClass(cls) -> None:
+        cls.genesis = cls.node.wallet.account_get_by_label("committee")
+        await cls.transfer(GAS, cls.genesis.script_hash, cls.user.script_hash, 100, 8)
+
+    async def test_forks_are_independent(self):
+        forks = self.node.fork(2)
+        try:
+            self.assertEqual(3, len({self.node.rpc_port, *(node.rpc_port for node in forks)}))
+            for node in forks:
+                self.assertIsNotNone(node.wallet.account_get_by_label("alice"))
+                receipt = await node.facade.test_invoke(GasToken().balance_of(self.user.script_hash))
+                self.assertEqual(100_00000000, receipt.result)
+
+            # the forks don't share state with the original node
+            await self.transfer(GAS, self.user.script_hash, self.genesis.script_hash, 10, 8, signing_account=self.user)
+            for node in forks:
+                receipt = await node.facade.test_invoke(GasToken().balance_of(self.user.script_hash))
+                self.assertEqual(100_00000000, receipt.result)
+        finally:
+            for node in forks:
+                node.stop()
+
+    def test_fork_options(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = pathlib.Path(tmp).joinpath("node.log")
+            node = NeoGoNode(
+                persistent=True,
+                on_demand_blocks=True,
+                config=NodeConfig(rpc_port=self.node.rpc_port + 1),
+                log_file=log_file,
+                rpc_pool_size=3,
+                rpc_batch_window=None,
+            )
+            node.start()
+            try:
+                forks = node.fork(2)
+                try:
+                    # a pinned port is replaced by a free one
+                    self.assertEqual(3, len({node.rpc_port, *(fork.rpc_port for fork in forks)}))
+                    self.assertEqual(
+                        [log_file.with_name("node.fork0.log"), log_file.with_name("node.fork1.log")],
+                        [fork.log_file for fork in forks],
+                    )
+                    for fork in forks:
+                        self.assertEqual(3, fork.rpc_pool_size)
+                        self.assertIsNone(fork.rpc_batch_window)
+                        self.assertTrue(fork.log_file.is_file())
+                finally:
+                    for fork in forks:
+                        fork.stop()
+            finally:
+                node.stop()
@@ -0,0 +1,71 @@
+import asyncio
+import pathlib
+import tempfile
+import unittest
+from boaconstructor import AsyncNeoGoNode, NeoGoNode, NodeConfig
+from boaconstructor.node import _RotatingFile
+
+
+class RotatingFileTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = pathlib.Path(tmp.name).joinpath("node.log")
+
+    def test_rotate(self):
+        f = _RotatingFile(self.path, max_bytes=10, backup_count=2)
+        for data in (b"aaaaaaaa", b"bbbbbbbb", b"cccccccc", b"dddddddd"):
+            f.write(data)
+        f.close()
+        self.assertEqual(b"dddddddd", self.path.read_bytes())
+        self.assertEqual(b"cccccccc", self.path.with_name("node.log.1").read_bytes())
+        self.assertEqual(b"bbbbbbbb", self.path.with_name("node.log.2").read_bytes())
+        self.assertFalse(self.path.with_name("node.log.3").exists())
+
+    def test_no_backups(self):
+        f = _RotatingFile(self.path, max_bytes=10, backup_count=0)
+        f.write(b"aaaaaaaa")
+        f.write(b"bbbbbbbb")
+        f.close()
+        self.assertEqual(b"bbbbbbbb", self.path.read_bytes())
+        self.assertFalse(self.path.with_name("node.log.1").exists())
+
+    def test_append(self):
+        self.path.write_bytes(b"aaaaaaaa")
+        f = _RotatingFile(self.path, max_bytes=10, backup_count=1)
+        # the size of the existing file counts
+        f.write(b"bbbbbbbb")
+        f.close()
+        self.assertEqual(b"bbbbbbbb", self.path.read_bytes())
+        self.assertEqual(b"aaaaaaaa", self.path.with_name("node.log.1").read_bytes())
+
+
+class QuietNodeTest(unittest.TestCase):
+    def test_log_levels(self):
+        for level in ("warn", "error"):
+            with self.subTest(level=level):
+                with tempfile.TemporaryDirectory() as tmp:
+                    log_file = pathlib.Path(tmp).joinpath("node.log")
+                    node = NeoGoNode(config=NodeConfig(log_level=level), log_file=log_file)
+                    self.assertFalse(node.captures_runtime_logs)
+                    # the ready message is not logged, readiness comes from polling the RPC port
+                    node.start()
+                    try:
+                        self.assertTrue(node.running)
+                        asyncio.run(self._check_node(node))
+                    finally:
+                        node.stop()
+                    self.assertNotIn(b"RPC server already started", log_file.read_bytes())
+
+    def test_async_node(self):
+        async def run():
+            async with AsyncNeoGoNode(config=NodeConfig(log_level="warn")) as node:
+                await self._check_node(node)
+
+        asyncio.run(run())
+
+    async def _check_node(self, node):
+        client = await node.rpc_client()
+        self.assertGreater(await client.get_block_count(), 0)
+        with self.assertRaises(ValueError):
+            await node.sync_runtime_logs()
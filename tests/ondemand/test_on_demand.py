@@ -0,0 +1,24 @@
+import asyncio
+from boaconstructor import SmartContractTestCase
+
+
+class OnDemandBlocksTest(SmartContractTestCase):
+    on_demand_blocks = True
+    use_daemon = False
+
+    async def _height(self) -> int:
+        client = await self.rpc_client()
+        return await client.get_block_count() - 1
+
+    async def test_idle(self):
+        # neo-go persists one block when consensus starts, which may still be pending
+        height = await self.node.produce_block()
+        # many times the block time of the configuration
+        await asyncio.sleep(1)
+        self.assertEqual(height, await self._height())
+
+    async def test_produce_block(self):
+        height = await self._height()
+        index = await self.node.produce_block()
+        self.assertGreater(index, height)
+        self.assertEqual(index, await self._height())
@@ -0,0 +1,48 @@
+import unittest
+from boaconstructor import SmartContractTestCase
+from boaconstructor.cache import ReadCache
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class ReadCacheTest(SmartContractTestCase):
+    read_cache_size = 16
+    # no new blocks between reads unless a transaction is sent
+    on_demand_blocks = True
+    use_daemon = False
+
+    async def _balance(self, user):
+        balance, _ = await self.call("balanceOf", [user], return_type=int, target_contract=GAS)
+        return balance
+
+    async def test_invalidated_by_new_block(self):
+        user = self.node.wallet.account_new("alice").script_hash
+        hits, misses = self.read_cache.hits, self.read_cache.misses
+        self.assertEqual(0, await self._balance(user))
+        self.assertEqual(0, await self._balance(user))
+        self.assertEqual((hits + 1, misses + 1), (self.read_cache.hits, self.read_cache.misses))
+
+        await self.transfer(GAS, self.node.account_committee.script_hash, user, 1, 8)
+        self.assertEqual(1_00000000, await self._balance(user))
+        self.assertEqual(misses + 2, self.read_cache.misses)
+
+    async def test_storage(self):
+        misses = self.read_cache.misses
+        first = await self.get_storage(target_contract=GAS)
+        second = await self.get_storage(target_contract=GAS)
+        self.assertEqual(first, second)
+        self.assertEqual(misses + 1, self.read_cache.misses)
+
+
+class LruTest(unittest.TestCase):
+    def test_lru(self):
+        cache = ReadCache(2)
+        cache.put("a", 1, 1)
+        cache.put("b", 1, 2)
+        self.assertEqual(1, cache.get("a", 1))
+        cache.put("c", 1, 3)
+        self.assertIsNone(cache.get("b", 1))
+        self.assertEqual(3, cache.get("c", 1))
+        self.assertIsNone(cache.get("a", 2))
+        self.assertEqual((2, 2), (cache.hits, cache.misses))
@@ -0,0 +1,111 @@
+import asyncio
+from unittest import mock
+from boaconstructor import SmartContractTestCase
+from boaconstructor.rpc import DEFAULT_RPC_TIMEOUT, calculate_network_fee
+from neo3 import vm
+from neo3.api.helpers import txbuilder
+from neo3.api.wrappers import GenericContract, NEP17Contract, PolicyContract
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class PooledRpcTest(SmartContractTestCase):
+    first_client = None
+
+    async def _check_client(self):
+        client = await self.rpc_client()
+        self.assertIs(client, await self.rpc_client())
+        # every test runs in a new event loop and gets a new client
+        self.assertIsNot(client, PooledRpcTest.first_client)
+        PooledRpcTest.first_client = client
+
+        balance, _ = await self.call("balanceOf", [self.node.account_committee.script_hash], return_type=int, target_contract=GAS)
+        self.assertGreater(balance, 0)
+        self.assertFalse(client.session.closed)
+
+    async def test_client1(self):
+        await self._check_client()
+
+    async def test_client2(self):
+        await self._check_client()
+
+    async def test_timeout(self):
+        client = await self.rpc_client()
+        # a hung node fails the request instead of the whole test run
+        self.assertEqual(DEFAULT_RPC_TIMEOUT, client.session.timeout.total)
+
+    async def test_batch(self):
+        client = await self.rpc_client()
+        batches_sent = client.batches_sent
+        owner = self.node.account_committee.script_hash
+        results = await asyncio.gather(
+            self.call("symbol", return_type=str, target_contract=GAS),
+            self.call("decimals", return_type=int, target_contract=GAS),
+            self.call("balanceOf", [owner], return_type=int, target_contract=GAS),
+        )
+        self.assertEqual(["GAS", 8], [value for value, _ in results[:2]])
+        self.assertGreater(results[2][0], 0)
+        self.assertEqual(batches_sent + 1, client.batches_sent)
+
+    async def test_local_network_fee(self):
+        client = await self.rpc_client()
+        for acc in (self.node.account_committee, self.node.wallet.account_new("bob")):
+            builder = txbuilder.TxBuilder(client, vm.ScriptBuilder().emit(vm.OpCode.RET).to_array())
+            builder.network = await self.node.facade.get_network()
+            for func, signer in self._signing_pairs([acc]):
+                builder.add_signer(func, signer)
+            builder.tx.valid_until_block = await client.block_count() + 10
+            # signing refuses a transaction without fees
+            builder.tx.system_fee = builder.tx.network_fee = 1
+            await builder.build_and_sign()
+            expected = await client.calculate_network_fee(builder.tx)
+            self.assertEqual(expected, calculate_network_fee(builder.tx, *await self.node.facade.fee_policy()))
+
+    async def test_signed_transaction(self):
+        client = await self.rpc_client()
+        owner = self.node.account_committee.script_hash
+        user = self.node.wallet.account_new().script_hash
+        height = await client.block_count()
+        receipt = await self.node.facade.invoke(
+            NEP17Contract(GAS).transfer_friendly(owner, user, 1, 8),
+            signers=self._signing_pairs([self.node.account_committee]),
+            valid_until_block=10,
+        )
+        self.assertTrue(receipt.result)
+        tx = await client.get_transaction(receipt.tx_hash)
+        # relative to the height at the time it was sent
+        self.assertGreaterEqual(tx.valid_until_block, height + 10)
+        self.assertLessEqual(tx.valid_until_block, receipt.included_in_block + 10)
+
+    async def _transfer(self, **kwargs):
+        owner = self.node.account_committee
+        user = self.node.wallet.account_new().script_hash
+        receipt = await self.node.facade.invoke(
+            NEP17Contract(GAS).transfer_friendly(owner.script_hash, user, 1, 8),
+            signers=self._signing_pairs([owner]),
+            **kwargs,
+        )
+        self.assertTrue(receipt.result)
+
+    async def test_cached_node_values(self):
+        await self._transfer()
+        client = await self.rpc_client()
+        with (
+            mock.patch.object(client, "invoke_script", wraps=client.invoke_script) as invoke_script,
+            mock.patch.object(client, "get_version", wraps=client.get_version) as get_version,
+        ):
+            # the block of the first transfer does not invalidate the fee policy
+            await self._transfer(system_fee=1_0000000)
+        invoke_script.assert_not_called()
+        get_version.assert_not_called()
+
+    async def test_fee_policy_change(self):
+        fee_per_byte, exec_fee_factor = await self.node.facade.fee_policy()
+        policy = GenericContract(PolicyContract().hash)
+        signers = self._signing_pairs([self.node.account_committee])
+        await self.node.facade.invoke(policy.call_function("setFeePerByte", [fee_per_byte * 2]), signers=signers)
+        self.assertEqual((fee_per_byte * 2, exec_fee_factor), await self.node.facade.fee_policy())
+        await self._transfer()
+        await self.node.facade.invoke(policy.call_function("setFeePerByte", [fee_per_byte]), signers=signers)
+        self.assertEqual((fee_per_byte, exec_fee_factor), await self.node.facade.fee_policy())
@@ -0,0 +1,31 @@
+import unittest
+from unittest import mock
+from boaconstructor import runner
+
+
+class ShardingTest(unittest.TestCase):
+    def test_balanced_by_duration(self):
+        durations = {"a": 10.0, "b": 6.0, "c": 4.0, "d": 1.0}
+        shards = runner.make_shards(list(durations), durations, 2)
+        totals = sorted(sum(durations[name] for name in shard) for shard in shards)
+        self.assertEqual([10.0, 11.0], totals)
+
+    def test_unknown_classes_get_average_duration(self):
+        durations = {"a": 2.0, "b": 4.0}
+        shards = runner.make_shards(["a", "b", "new1", "new2"], durations, 2)
+        self.assertEqual(2, len(shards))
+        self.assertEqual({"a", "b", "new1", "new2"}, {name for shard in shards for name in shard})
+        self.assertTrue(all(len(shard) == 2 for shard in shards))
+
+    def test_no_empty_shards(self):
+        shards = runner.make_shards(["a"], {}, 8)
+        self.assertEqual([["a"]], shards)
+
+
+class MainTest(unittest.TestCase):
+    def test_isolated_by_default(self):
+        with mock.patch.object(runner, "run") as run:
+            runner.main(["-s", "tests"])
+            self.assertFalse(run.call_args.kwargs["shared_node"])
+            runner.main(["-s", "tests", "--shared-node"])
+            self.assertTrue(run.call_args.kwargs["shared_node"])
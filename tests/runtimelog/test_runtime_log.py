@@ -53,3 +53,28 @@ class RuntimeLogTest(SmartContractTestCase):
         self.assertEqual(1, len(self.runtime_logs))
         self.assertEqual(self.contract_hash, self.runtime_logs[0].contract)
         self.assertEqual(json.dumps(msg, separators=(',', ':')), self.runtime_logs[0].msg)
+
+    async def test_return_logs_test_invoke(self):
+        msg = "msg4"
+        _, _, logs = await self.call("print_str", [msg], return_type=None, return_logs=True)
+        self.assertEqual(1, len(logs))
+        self.assertEqual(self.contract_hash, logs[0].contract)
+        self.assertEqual(msg, logs[0].msg)
+
+    async def test_return_logs_persisted(self):
+        msg = "msg5"
+        _, _, logs = await self.call(
+            "print_str",
+            [msg],
+            return_type=None,
+            signing_accounts=[self.genesis],
+            signers=[Signer(self.genesis.script_hash)],
+            return_logs=True,
+        )
+        self.assertEqual([msg], [log.msg for log in logs])
+        self.assertEqual(logs, self.node.runtime_logs)
+
+    async def test_list_decoded(self):
+        msg = [1, 2, 3]
+        _, _, logs = await self.call("print_list", [msg], return_type=None, return_logs=True)
+        self.assertEqual(msg, logs[0].json())
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import unittest
+from boaconstructor import NeoGoNode, SmartContractTestCase
+from neo3 import vm
+from neo3.api.wrappers import ContractMethodResult
+from neo3.contracts.contract import CONTRACT_HASHES
+
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+SHUTDOWN_SCRIPT = """
+from boaconstructor import NeoGoNode
+node = NeoGoNode.shared()
+print(node._process.pid, node.work_dir, flush=True)
+"""
+
+
+class SharedNodeTest(unittest.TestCase):
+    def test_sessions(self):
+        seen = {}
+
+        class First(SmartContractTestCase):
+            shared_node = True
+            enable_checkpoints = True
+            use_daemon = False
+
+            async def test_use(self):
+                seen["node"] = self.node
+                user = self.node.wallet.account_new()
+                seen["user"] = user
+                await self.transfer(GAS, self.node.account_committee.script_hash, user.script_hash, 1, 8)
+                sb = vm.ScriptBuilder().emit_push("first").emit_syscall(vm.Syscalls.SYSTEM_RUNTIME_LOG)
+                await self.node.facade.test_invoke(ContractMethodResult(sb.to_array()))
+                await self.node.sync_runtime_logs()
+                self.assertNotEqual([], self.runtime_logs)
+                self.checkpoint()
+
+        class Second(SmartContractTestCase):
+            shared_node = True
+            enable_checkpoints = True
+            use_daemon = False
+
+            async def test_use(self):
+                # the same node process, but a session of its own
+                seen["second"] = self.node
+                user = seen["user"]
+                self.assertNotIn(user, self.node.wallet.accounts)
+                self.assertEqual([], self.runtime_logs)
+                # the checkpoint of the first class is not rolled back to
+                self.assertFalse(self.node.has_checkpoint)
+                # chain state is shared between the sessions
+                balance, _ = await self.call("balanceOf", [user.script_hash], return_type=int, target_contract=GAS)
+                self.assertEqual(1_00000000, balance)
+
+        loader = unittest.TestLoader()
+        suite = unittest.TestSuite([loader.loadTestsFromTestCase(First), loader.loadTestsFromTestCase(Second)])
+        result = unittest.TestResult()
+        suite.run(result)
+        self.assertEqual([], result.errors + result.failures)
+        self.assertEqual(2, result.testsRun)
+        self.assertIs(seen["node"], seen["second"])
+        self.assertTrue(seen["node"].running)
+
+    def test_identity(self):
+        node = NeoGoNode.shared(persistent=True)
+        self.assertIs(node, NeoGoNode.shared(persistent=True))
+        self.assertIsNot(node, NeoGoNode.shared(persistent=True, on_demand_blocks=True))
+
+    def test_stopped_at_exit(self):
+        # the interpreter must not wait for the node, which is stopped by an `atexit` hook
+        process = subprocess.run(
+            [sys.executable, "-c", SHUTDOWN_SCRIPT], capture_output=True, text=True, timeout=60, check=True
+        )
+        pid, work_dir = process.stdout.split()
+        self.assertFalse(os.path.exists(work_dir))
+        if sys.platform != "win32":
+            with self.assertRaises(ProcessLookupError):
+                os.kill(int(pid), 0)
@@ -0,0 +1,119 @@
+import asyncio
+import socket
+import unittest
+from unittest import mock
+from boaconstructor import AsyncNeoGoNode, NeoGoNode, NodeConfig, NodeStartupError
+from boaconstructor import node as node_module
+
+# neo-go refuses to start with an unknown hardfork
+BAD_CONFIG = NodeConfig(hardforks={"NoSuchFork": 0})
+
+
+class StartupErrorTest(unittest.TestCase):
+    def _node(self, **kwargs) -> tuple[NeoGoNode, list]:
+        node = NeoGoNode(**kwargs)
+        self.addCleanup(node.stop)
+        processes = []
+        spawn = node._spawn
+
+        def record_spawn():
+            spawn()
+            processes.append(node._process)
+
+        node._spawn = record_spawn
+        return node, processes
+
+    def _assert_stopped(self, node: NeoGoNode, processes: list) -> None:
+        self.assertFalse(node.running)
+        self.assertEqual(1, len(processes))
+        self.assertIsNotNone(processes[0].poll())
+
+    def test_timeout(self):
+        node, processes = self._node()
+        with self.assertRaises(NodeStartupError) as ctx:
+            node.start(timeout=0.001)
+        self.assertIn("did not become ready", str(ctx.exception))
+        self._assert_stopped(node, processes)
+
+    def test_exit(self):
+        node, processes = self._node(config=BAD_CONFIG)
+        with self.assertRaises(NodeStartupError) as ctx:
+            node.start()
+        self.assertIn("exited during startup", str(ctx.exception))
+        self.assertIn("NoSuchFork", ctx.exception.output)
+        self._assert_stopped(node, processes)
+
+    def test_start_async(self):
+        node, processes = self._node(config=BAD_CONFIG)
+        with self.assertRaises(NodeStartupError) as ctx:
+            asyncio.run(node.start_async())
+        self.assertIn("exited during startup", str(ctx.exception))
+        self._assert_stopped(node, processes)
+
+        node, processes = self._node()
+        with self.assertRaises(NodeStartupError) as ctx:
+            asyncio.run(node.start_async(timeout=0.001))
+        self.assertIn("did not become ready", str(ctx.exception))
+        self._assert_stopped(node, processes)
+
+
+class AsyncStartupErrorTest(unittest.IsolatedAsyncioTestCase):
+    async def test_exit(self):
+        node = AsyncNeoGoNode(config=BAD_CONFIG)
+        with self.assertRaises(NodeStartupError) as ctx:
+            await node.start()
+        self.assertIn("exited during startup", str(ctx.exception))
+        self.assertFalse(node.running)
+        await node.stop()
+
+    async def test_timeout(self):
+        node = AsyncNeoGoNode()
+        with self.assertRaises(NodeStartupError) as ctx:
+            await node.start(timeout=0.001)
+        self.assertIn("did not become ready", str(ctx.exception))
+        self.assertFalse(node.running)
+        await node.stop()
+
+
+class RpcPortTakenTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # another process that got the same free port
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(self.listener.close)
+        self.taken_port = self.listener.getsockname()[1]
+        find_free_port = node_module._find_free_port
+        ports = iter([self.taken_port])
+        patcher = mock.patch.object(
+            node_module, "_find_free_port", side_effect=lambda host: next(ports, None) or find_free_port(host)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retry(self):
+        node = NeoGoNode()
+        self.addCleanup(node.stop)
+        self.assertEqual(self.taken_port, node.rpc_port)
+        node.start()
+        self.assertNotEqual(self.taken_port, node.rpc_port)
+        self.assertIn(str(node.rpc_port), node.facade.rpc_host)
+        self.assertGreater(asyncio.run(self._block_count(node)), 0)
+
+    def test_retry_async(self):
+        async def run():
+            async with AsyncNeoGoNode() as node:
+                self.assertNotEqual(self.taken_port, node.rpc_port)
+                self.assertGreater(await self._block_count(node), 0)
+
+        asyncio.run(run())
+
+    def test_pinned_port(self):
+        node = NeoGoNode(config=NodeConfig(rpc_port=self.taken_port))
+        self.addCleanup(node.stop)
+        with self.assertRaises(NodeStartupError) as ctx:
+            node.start()
+        self.assertIn(f"RPC port {self.taken_port} is in use", str(ctx.exception))
+        self.assertFalse(node.running)
+
+    async def _block_count(self, node) -> int:
+        client = await node.rpc_client()
+        return await client.get_block_count()
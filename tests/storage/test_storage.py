@@ -0,0 +1,73 @@
+import os
+import pathlib
+import tempfile
+from unittest import mock
+from boaconstructor import UPDATE_DIGESTS_ENV, SmartContractTestCase
+from neo3.contracts.contract import CONTRACT_HASHES
+
+NEO = CONTRACT_HASHES.NEO_TOKEN
+GAS = CONTRACT_HASHES.GAS_TOKEN
+
+
+class StorageTest(SmartContractTestCase):
+    # no new blocks, and no GAS rewards, between reads unless a transaction is sent
+    on_demand_blocks = True
+    use_daemon = False
+
+    async def test_iter_and_count(self):
+        storage = await self.get_storage(target_contract=NEO)
+        self.assertGreater(len(storage), 1)
+        entries = [entry async for entry in self.iter_storage(target_contract=NEO)]
+        self.assertEqual(sorted(storage.items()), entries)
+        self.assertEqual(len(storage), await self.count_storage(target_contract=NEO))
+
+    async def test_start_key_and_limit(self):
+        keys = sorted(await self.get_storage(target_contract=NEO))
+        start_key = keys[len(keys) // 2]
+        page = await self.get_storage(target_contract=NEO, start_key=start_key, limit=2)
+        self.assertEqual(keys[len(keys) // 2 :][:2], sorted(page))
+
+    async def test_prefixes(self):
+        storage = await self.get_storage(target_contract=NEO)
+        prefixes = sorted({key[:1] for key in storage})
+        self.assertEqual(storage, await self.get_storage(prefixes, target_contract=NEO))
+        with self.assertRaises(ValueError):
+            await self.get_storage([b"\x01", b"\x01\x02"], target_contract=NEO)
+
+    async def test_storage_diff(self):
+        owner = self.node.account_committee.script_hash
+        user = self.node.wallet.account_new("alice").script_hash
+        # account states of the GAS contract
+        baseline = await self.storage_diff(b"\x14", target_contract=GAS, remove_prefix=True)
+        self.assertFalse(await baseline.changes())
+
+        await self.transfer(GAS, owner, user, 1, 8)
+        changes = await baseline.changes(rebase=True)
+        self.assertEqual([user.to_array()], list(changes.added))
+        self.assertIn(owner.to_array(), changes.modified)
+        self.assertEqual({}, changes.removed)
+
+        changes = await baseline.changes()
+        self.assertEqual({}, changes.added)
+
+    async def test_storage_digest(self):
+        owner = self.node.account_committee.script_hash
+        user = self.node.wallet.account_new("bob").script_hash
+        expected = await self.storage_digest(b"\x14", target_contract=GAS)
+        self.assertEqual(expected, await self.storage_digest(b"\x14", target_contract=GAS))
+        await self.assert_storage_digest(expected, b"\x14", target_contract=GAS)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            golden = pathlib.Path(tmp).joinpath("gas.json")
+            # a missing golden file is only recorded on request
+            with self.assertRaises(AssertionError):
+                await self.assert_storage_digest(golden, b"\x14", target_contract=GAS)
+            self.assertFalse(golden.exists())
+            with mock.patch.dict(os.environ, {UPDATE_DIGESTS_ENV: "1"}):
+                await self.assert_storage_digest(golden, b"\x14", target_contract=GAS)
+            await self.assert_storage_digest(golden, b"\x14", target_contract=GAS)
+
+            await self.transfer(GAS, owner, user, 1, 8)
+            with self.assertRaises(AssertionError) as context:
+                await self.assert_storage_digest(golden, b"\x14", target_contract=GAS)
+            self.assertIn(user.to_array().hex(), str(context.exception))